@@ -0,0 +1,125 @@
+import datetime
+import hashlib
+import uuid
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.serialisation import encode_item, encode_page, item_model, public_columns
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.crud.counts import get_count
+from backend.app.crud.pagination import paginate
+from backend.app.models.models import User
+
+
+""" CONDITIONAL GETS """
+# Reads first fetch only the version columns. A matching If-None-Match is answered with a 304 before the row is
+# loaded or serialised, and otherwise the serialised body comes from a cache keyed by those versions - so every
+# change is serialised once and a polling client costs one narrow query.
+# List ETags cover the count and the id/version of every row on the page, so inserts and deletes change them too.
+# Lists don't send Last-Modified - a delete leaves every remaining updated_at as it was.
+# Bodies are encoded straight from row tuples of just the selected fields (see serialisation.py).
+
+response_cache = TTLCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+def make_etag(*parts: Any) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime.datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 asks for If-None-Match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _headers(etag: str, last_modified: Optional[datetime.datetime]) -> dict[str, str]:
+    # private - responses depend on who is asking; no-cache - clients must revalidate, which is the cheap path
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(datetime.timezone.utc), usegmt=True)
+    return headers
+
+
+def _respond(request: Request, body: bytes, etag: str, last_modified: Optional[datetime.datetime]) -> Response:
+    headers = _headers(etag, last_modified)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def get_entity(request: Request, session: AsyncSession, current_user: User, model: Any, public_model: Any,
+                     id: uuid.UUID, name: str, fields: Optional[str] = None) -> Response:
+    """GET /{id} for a versioned table model. Rows of tables without an owner are superuser only."""
+    table = model.__table__
+    columns = public_columns(model, public_model, fields)
+    names = [column.name for column in columns]
+    meta_columns = [table.c.version, table.c.updated_at]
+    if "owner_id" in table.c:
+        meta_columns.append(table.c.owner_id)
+    meta = (await session.execute(select(*meta_columns).where(table.c.id == id))).first()
+    if meta is None:
+        raise HTTPException(status_code=404, detail=f"{name} not found")
+    if not current_user.is_superuser and getattr(meta, "owner_id", None) != current_user.id:
+        raise HTTPException(status_code=400, detail=f"No permission to access this {name.lower()}")
+
+    etag = make_etag(table.name, id, meta.version, names)
+    if _not_modified(request, etag, meta.updated_at):
+        return Response(status_code=304, headers=_headers(etag, meta.updated_at))
+
+    cached = response_cache.get(etag)
+    if cached is None:
+        row = (await session.execute(
+            select(table.c.version, table.c.updated_at, *columns).where(table.c.id == id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"{name} not found")
+        # The row may have moved on since the version check - cache and tag what was actually loaded
+        etag = make_etag(table.name, id, row.version, names)
+        cached = (encode_item(names, tuple(row)[2:]), row.updated_at)
+        response_cache.set(etag, cached)
+    body, updated_at = cached
+    return _respond(request, body, etag, updated_at)
+
+
+async def get_entity_list(request: Request, session: AsyncSession, model: Any, list_model: type[SQLModel], key: str,
+                          *filters: Any, owner_id: Optional[uuid.UUID] = None, count_filters: Any = (),
+                          limit: int, cursor: Optional[str] = None, fields: Optional[str] = None) -> Response:
+    """A keyset page of a versioned table model, serialised as list_model(key=[...], count=..., next_cursor=...)."""
+    table = model.__table__
+    columns = public_columns(model, item_model(list_model, key), fields)
+    names = [column.name for column in columns]
+    count, count_exact = await get_count(session, model, owner_id=owner_id, filters=count_filters)
+    page, next_cursor = await paginate(
+        session, model, *filters, limit=limit, cursor=cursor, columns=(table.c.id, table.c.version)
+    )
+
+    etag = make_etag(table.name, names, count, count_exact, next_cursor, [(row.id, row.version) for row in page])
+    if _not_modified(request, etag, None):
+        return Response(status_code=304, headers=_headers(etag, None))
+
+    body = response_cache.get(etag)
+    if body is None:
+        statement = select(table.c.version, *columns).where(table.c.id.in_([row.id for row in page])).order_by(table.c.id)
+        rows = list((await session.execute(statement)).all())
+        etag = make_etag(table.name, names, count, count_exact, next_cursor, [(row.id, row.version) for row in rows])
+        body = encode_page(
+            key, names, [tuple(row)[1:] for row in rows],
+            count=count, count_exact=count_exact, next_cursor=next_cursor,
+        )
+        response_cache.set(etag, body)
+    return _respond(request, body, etag, None)
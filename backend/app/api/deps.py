@@ -1,13 +1,16 @@
+import time
 from typing import Annotated
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException
 from jwt import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
+from backend.app.core.auth_cache import token_cache, user_cache
 from backend.app.core.config import settings
-from backend.app.core.db import engine
+from backend.app.core.db import engine, async_engine
 from backend.app.models.models import User, TokenPayload
 
 
@@ -19,20 +22,37 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False so attributes can still be read after commit without an implicit (sync) reload
+    # The session connects on its first statement - routes answered from caches never touch the pool, and pool
+    # waits are measured by pool_stats' events whenever a connection is taken
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(oauth2_extract)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
-    try:
-        data = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.HASHING_ALGORITHM])
-        token_data = TokenPayload(**data)
-    except (InvalidTokenError, ValidationError):
-        raise HTTPException(status_code=403, detail="Invalid token - could not validate credentials")
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            data = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.HASHING_ALGORITHM])
+            token_data = TokenPayload(**data)
+        except (InvalidTokenError, ValidationError):
+            raise HTTPException(status_code=403, detail="Invalid token - could not validate credentials")
+        user_id = token_data.sub
+        # Never cache a token past its own expiry
+        token_cache.set(token, user_id, ttl=data.get("exp", 0) - time.time())
 
-    user = session.get(User, token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_cache.set(user_id, user)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user - can't be current!")
 
@@ -40,7 +60,7 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+async def get_current_active_superuser(current_user: CurrentUser) -> User:
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="The user is not superuser")
     return current_user
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from backend.app.api.routes import narratives, users, login, experiences, experience_components, substories, sites, tours
+from backend.app.api.routes import narratives, users, login, experiences, experience_components, substories, sites, tours, \
+    hubs, clusters, artefacts, utils, imports, links, search, graph, exports, metrics, health
 
 from backend.app.core.config import settings
 
@@ -12,4 +13,15 @@ api_router.include_router(experiences.router)
 api_router.include_router(experience_components.router)
 api_router.include_router(substories.router)
 api_router.include_router(sites.router)
-api_router.include_router(tours.router)
\ No newline at end of file
+api_router.include_router(tours.router)
+api_router.include_router(hubs.router)
+api_router.include_router(clusters.router)
+api_router.include_router(artefacts.router)
+api_router.include_router(utils.router)
+api_router.include_router(imports.router)
+api_router.include_router(links.router)
+api_router.include_router(search.router)
+api_router.include_router(graph.router)
+api_router.include_router(exports.router)
+api_router.include_router(metrics.router)
+api_router.include_router(health.router)
@@ -1,66 +1,84 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, File, Request, UploadFile
+from sqlmodel import select
 
-from backend.app.api.deps import SessionDep, get_current_active_superuser, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser, CurrentUser
 from backend.app.crud import crud
-from backend.app.models.models import Artefact, ArtefactCreate, ArtefactsPublic, ArtefactPublic
+from backend.app.crud.media import attach_media, delete_media, get_media, get_media_artefact, \
+    list_media, media_response, remove_unreferenced
+from backend.app.models.models import Artefact, ArtefactCreate, ArtefactMedia, ArtefactMediaPublic, ArtefactsPublic, \
+    ArtefactPublic
 
 router = APIRouter(prefix="/artefacts", tags=["artefacts"])
 
 
 @router.get("/{id}", response_model=ArtefactPublic)
-def get_artefact(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
-    artefact = session.get(Artefact, id)
-    if not artefact:
-        raise HTTPException(status_code=404, detail="Artefact not found")
-    if not current_user.is_superuser and (artefact.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this artefact")
-    return artefact
+async def get_artefact(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                       fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Artefact, ArtefactPublic, id, "Artefact", fields=fields)
 
 
 @router.get("/", response_model=ArtefactsPublic)
-def get_artefacts(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_artefacts(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                        cursor: str | None = None, fields: str | None = None) -> Any:
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Artefact)
-        count = session.exec(count_statement).one()
-        statement = select(Artefact).limit(limit)
-        artefacts = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Artefact)
-            .where(Artefact.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Artefact)
-            .where(Artefact.owner_id == current_user.id)
-            .limit(limit)
-        )
-        artefacts = session.exec(statement).all()
-
-    return ArtefactsPublic(data=artefacts, count=count)
+        return await get_entity_list(request, session, Artefact, ArtefactsPublic, "artefacts", limit=limit, cursor=cursor, fields=fields)
+    return await get_entity_list(
+        request, session, Artefact, ArtefactsPublic, "artefacts", Artefact.owner_id == current_user.id,
+        owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.post("/", response_model=ArtefactPublic)
-def create_artefact(session: SessionDep, artefact_in: ArtefactCreate, current_user: CurrentUser) -> Any:
+async def create_artefact(session: AsyncSessionDep, artefact_in: ArtefactCreate, current_user: CurrentUser) -> Any:
     artefact = Artefact.model_validate(artefact_in, update={"owner_id": current_user.id})
     session.add(artefact)
-    session.commit()
-    session.refresh(artefact)
+    await session.commit()
+    await session.refresh(artefact)
     return artefact
 
 
 @router.delete("/{id}")
-def delete_artefact(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> str:
-    artefact = session.get(Artefact, id)
+async def delete_artefact(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> str:
+    artefact = await session.get(Artefact, id)
     if not artefact:
         raise HTTPException(status_code=404, detail="Artefact not found")
     if not current_user.is_superuser and (artefact.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this artefact")
-    session.delete(artefact)
-    session.commit()
-    return f"Artefact: {id} deleted successfully"
\ No newline at end of file
+    # The media rows go with the artefact (ON DELETE CASCADE) - their files only once nothing else uses them
+    hashes = (await session.exec(select(ArtefactMedia.sha256).where(ArtefactMedia.artefact_id == id))).all()
+    await session.delete(artefact)
+    await session.commit()
+    await remove_unreferenced(session, hashes)
+    return f"Artefact: {id} deleted successfully"
+
+""" MEDIA """
+@router.get("/{id}/media", response_model=list[ArtefactMediaPublic])
+async def get_artefact_media(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    await get_media_artefact(session, current_user, id)
+    return await list_media(session, id)
+
+
+@router.post("/{id}/media", response_model=ArtefactMediaPublic)
+async def upload_artefact_media(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                                file: UploadFile = File(...)) -> Any:
+    artefact = await get_media_artefact(session, current_user, id)
+    return await attach_media(session, artefact, file)
+
+
+@router.get("/{id}/media/{media_id}")
+async def download_artefact_media(id: uuid.UUID, media_id: uuid.UUID, session: AsyncSessionDep,
+                                  current_user: CurrentUser) -> Any:
+    await get_media_artefact(session, current_user, id)
+    return media_response(await get_media(session, id, media_id))
+
+
+@router.delete("/{id}/media/{media_id}")
+async def delete_artefact_media(id: uuid.UUID, media_id: uuid.UUID, session: AsyncSessionDep,
+                                current_user: CurrentUser) -> str:
+    await get_media_artefact(session, current_user, id)
+    await delete_media(session, await get_media(session, id, media_id))
+    return f"Media: {media_id} deleted successfully"
@@ -1,64 +1,53 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request
 
-from backend.app.api.deps import SessionDep, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.crud.spatial import bbox_filter
 from backend.app.models.models import Cluster, ClustersPublic, ClusterCreate, ClusterPublic
 
 router = APIRouter(prefix="/clusters", tags=["clusters"])
 
 
 @router.get("/", response_model=ClustersPublic)
-def get_clusters(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_clusters(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                       cursor: str | None = None, bbox: str | None = None, fields: str | None = None) -> Any:
+    # bbox=west,south,east,north returns only the clusters whose boundary overlaps that viewport
+    filters = [bbox_filter(Cluster, "cluster", bbox)] if bbox else []
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Cluster)
-        count = session.exec(count_statement).one()
-        statement = select(Cluster).limit(limit)
-        clusters = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Cluster)
-            .where(Cluster.owner_id == current_user.id)
+        return await get_entity_list(
+            request, session, Cluster, ClustersPublic, "clusters", *filters, count_filters=filters, limit=limit, cursor=cursor, fields=fields
         )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Cluster)
-            .where(Cluster.owner_id == current_user.id)
-            .limit(limit)
-        )
-        clusters = session.exec(statement).all()
-
-    return ClustersPublic(data=clusters, count=count)
+    return await get_entity_list(
+        request, session, Cluster, ClustersPublic, "clusters", Cluster.owner_id == current_user.id, *filters,
+        owner_id=current_user.id, count_filters=filters, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.get("/{id}", response_model=ClusterPublic)
-def get_cluster(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
-    cluster = session.get(Cluster, id)
-    if not cluster:
-        raise HTTPException(status_code=404, detail="Cluster not found")
-    if not current_user.is_superuser and (cluster.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this cluster")
+async def get_cluster(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                      fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Cluster, ClusterPublic, id, "Cluster", fields=fields)
 
 
 @router.post("/", response_model=ClusterPublic)
-def create_cluster(session: SessionDep, cluster_in: ClusterCreate, current_user: CurrentUser) -> Any:
+async def create_cluster(session: AsyncSessionDep, cluster_in: ClusterCreate, current_user: CurrentUser) -> Any:
     cluster = Cluster.model_validate(cluster_in, update={"owner_id": current_user.id})
     session.add(cluster)
-    session.commit()
-    session.refresh(cluster)
+    await session.commit()
+    await session.refresh(cluster)
     return cluster
 
 
 @router.delete("/{id}")
-def delete_cluster(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
-    cluster = session.get(Cluster, id)
+async def delete_cluster(session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
+    cluster = await session.get(Cluster, id)
     if not cluster:
         raise HTTPException(status_code=404, detail="Cluster not found")
     if not current_user.is_superuser and (cluster.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this cluster")
-    session.delete(cluster)
-    session.commit()
+    await session.delete(cluster)
+    await session.commit()
     return f"Cluster: {id} deleted successfully"
\ No newline at end of file
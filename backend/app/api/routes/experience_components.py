@@ -1,71 +1,49 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from app.models.models import ExperienceComponentCreate
-from backend.app.api.deps import SessionDep, get_current_active_superuser, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser, CurrentUser
 from backend.app.models.models import Experience, ExperienceComponentsPublic, ExperienceComponentPublic, \
-    ExperienceCreate, ExperienceComponent
+    ExperienceCreate, ExperienceComponent, ExperienceComponentCreate
 
-router = APIRouter(prefix="/experience_components`", tags=["experience_components"])
+router = APIRouter(prefix="/experience_components", tags=["experience_components"])
 
 
 @router.get("/{id}", response_model=ExperienceComponentPublic)
-def get_experience_component(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
-    experience_component = session.get(ExperienceComponent, id)
-    if not experience_component:
-        raise HTTPException(status_code=404, detail="Experience Component not found")
-    if not current_user.is_superuser and (experience_component.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this Experience Component")
-    return experience_component
+async def get_experience_component(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                                   fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, ExperienceComponent, ExperienceComponentPublic, id, "Experience component", fields=fields)
 
 
 @router.get("/", response_model=ExperienceComponentsPublic)
-def get_experience_components(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_experience_components(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                                    cursor: str | None = None, fields: str | None = None) -> Any:
     if current_user.is_superuser:
-        count_statement = (
-            select(func.count())
-            .select_from(ExperienceComponent)
-            .where(ExperienceComponent.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = select(ExperienceComponent).limit(limit)
-        experience_components = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(ExperienceComponent)
-            .where(ExperienceComponent.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(ExperienceComponent)
-            .where(ExperienceComponent.owner_id == current_user.id)
-            .limit(limit)
-        )
-        experience_components = session.exec(statement).all()
-
-    return ExperienceComponentsPublic(data=experience_components, count=count)
+        return await get_entity_list(request, session, ExperienceComponent, ExperienceComponentsPublic, "experience_components", limit=limit, cursor=cursor, fields=fields)
+    return await get_entity_list(
+        request, session, ExperienceComponent, ExperienceComponentsPublic, "experience_components", ExperienceComponent.owner_id == current_user.id,
+        owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.post("/", response_model=ExperienceComponentPublic)
-def create_experience_component(session: SessionDep, experience_components_in: ExperienceComponentCreate, current_user: CurrentUser) -> Any:
+async def create_experience_component(session: AsyncSessionDep, experience_components_in: ExperienceComponentCreate, current_user: CurrentUser) -> Any:
     experience_components = ExperienceComponent.model_validate(experience_components_in, update={"owner_id": current_user.id})
     session.add(experience_components)
-    session.commit()
-    session.refresh(experience_components)
+    await session.commit()
+    await session.refresh(experience_components)
     return experience_components
 
 
 @router.delete("/{id}")
-def delete_experience_component(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> str:
-    experience_components = session.get(ExperienceComponent, id)
+async def delete_experience_component(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> str:
+    experience_components = await session.get(ExperienceComponent, id)
     if not experience_components:
         raise HTTPException(status_code=404, detail="Experience Component not found")
     if not current_user.is_superuser and (experience_components.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this experience_components")
-    session.delete(experience_components)
-    session.commit()
+    await session.delete(experience_components)
+    await session.commit()
     return f"Experience Component: {id} deleted successfully"
\ No newline at end of file
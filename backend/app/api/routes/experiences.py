@@ -1,66 +1,58 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from backend.app.api.deps import SessionDep, get_current_active_superuser, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser, CurrentUser
 from backend.app.crud import crud
-from backend.app.models.models import ExperienceBase, Experience, ExperiencesPublic, ExperiencePublic, ExperienceCreate
+from backend.app.models.models import ExperienceBase, Experience, ExperiencesPublic, ExperiencePublic, ExperienceCreate, \
+    PortfolioStats
+from backend.app.services.portfolio import get_portfolio
 
 router = APIRouter(prefix="/experiences", tags=["experiences"])
 
 
+@router.get("/portfolio", response_model=PortfolioStats)
+async def get_experience_portfolio(session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    # Superusers see the whole portfolio, everyone else their own experiences
+    owner_id = None if current_user.is_superuser else current_user.id
+    return await get_portfolio(session, owner_id=owner_id)
+
+
 @router.get("/{id}", response_model=ExperiencePublic)
-def get_experience(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
-    experience = session.get(Experience, id)
-    if not experience:
-        raise HTTPException(status_code=404, detail="Experience not found")
-    if not current_user.is_superuser and (experience.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this experience")
-    return experience
+async def get_experience(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                         fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Experience, ExperiencePublic, id, "Experience", fields=fields)
 
 
 @router.get("/", response_model=ExperiencesPublic)
-def get_experiences(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_experiences(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                          cursor: str | None = None, fields: str | None = None) -> Any:
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Experience)
-        count = session.exec(count_statement).one()
-        statement = select(Experience).limit(limit)
-        experiences = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Experience)
-            .where(Experience.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Experience)
-            .where(Experience.owner_id == current_user.id)
-            .limit(limit)
-        )
-        experiences = session.exec(statement).all()
-
-    return ExperiencesPublic(data=experiences, count=count)
+        return await get_entity_list(request, session, Experience, ExperiencesPublic, "experiences", limit=limit, cursor=cursor, fields=fields)
+    return await get_entity_list(
+        request, session, Experience, ExperiencesPublic, "experiences", Experience.owner_id == current_user.id,
+        owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.post("/", response_model=ExperiencePublic)
-def create_experience(session: SessionDep, experience_in: ExperienceCreate, current_user: CurrentUser) -> Any:
+async def create_experience(session: AsyncSessionDep, experience_in: ExperienceCreate, current_user: CurrentUser) -> Any:
     experience = Experience.model_validate(experience_in, update={"owner_id": current_user.id})
     session.add(experience)
-    session.commit()
-    session.refresh(experience)
+    await session.commit()
+    await session.refresh(experience)
     return experience
 
 
 @router.delete("/{id}")
-def delete_experience(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> str:
-    experience = session.get(Experience, id)
+async def delete_experience(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> str:
+    experience = await session.get(Experience, id)
     if not experience:
         raise HTTPException(status_code=404, detail="Experience not found")
     if not current_user.is_superuser and (experience.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this experience")
-    session.delete(experience)
-    session.commit()
+    await session.delete(experience)
+    await session.commit()
     return f"Experience: {id} deleted successfully"
\ No newline at end of file
@@ -0,0 +1,26 @@
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from backend.app.api.deps import CurrentUser
+from backend.app.crud.export import EXPORTABLE, get_exportable, stream_rows
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+@router.get("/", response_model=list[str])
+async def get_exports(current_user: CurrentUser) -> Any:
+    return [entity for entity, model in EXPORTABLE.items() if current_user.is_superuser or "owner_id" in model.__table__.c]
+
+
+@router.get("/{entity}")
+async def export_entities(entity: str, current_user: CurrentUser) -> StreamingResponse:
+    # Superusers get the whole table, everyone else only the rows they own
+    model = get_exportable(entity, current_user.is_superuser)
+    owner_id = None if current_user.is_superuser else current_user.id
+    return StreamingResponse(
+        stream_rows(model, owner_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{entity}.ndjson"'},
+    )
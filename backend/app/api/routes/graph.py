@@ -0,0 +1,105 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.deps import AsyncSessionDep, CurrentUser, get_current_active_superuser
+from backend.app.models.models import GraphNode, GraphNodes, GraphPath, GraphStats
+from backend.app.services.city_graph import NODE_TABLES, Node, city_graph
+from backend.app.services.graph_view import ViewFormat, render_view
+
+router = APIRouter(prefix="/graph", tags=["graph"])
+
+
+def _kinds(kinds: str | None) -> list[str]:
+    values = [kind.strip() for kind in kinds.split(",")] if kinds else []
+    unknown = [kind for kind in values if kind not in NODE_TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind {', '.join(unknown)} - expected one of {', '.join(NODE_TABLES)}")
+    return values
+
+
+async def _node(session: AsyncSession, kind: str, id: uuid.UUID) -> Node:
+    _kinds(kind)
+    await city_graph.ensure_loaded(session)
+    node = (kind, id)
+    if not city_graph.has_node(node):
+        raise HTTPException(status_code=404, detail=f"{kind} {id} not found")
+    return node
+
+
+@router.get("/stats", response_model=GraphStats)
+async def read_graph_stats(session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    await city_graph.ensure_loaded(session)
+    return GraphStats(
+        loaded=city_graph.loaded,
+        version=city_graph.version,
+        nodes=city_graph.graph.number_of_nodes(),
+        edges=city_graph.graph.number_of_edges(),
+    )
+
+
+@router.post("/rebuild", dependencies=[Depends(get_current_active_superuser)], response_model=GraphStats)
+async def rebuild_graph(session: AsyncSessionDep) -> Any:
+    # The graph is per process - this picks up writes made through another worker
+    await city_graph.load(session)
+    return GraphStats(
+        loaded=city_graph.loaded,
+        version=city_graph.version,
+        nodes=city_graph.graph.number_of_nodes(),
+        edges=city_graph.graph.number_of_edges(),
+    )
+
+
+@router.get("/path", response_model=GraphPath)
+async def read_shortest_path(session: AsyncSessionDep, current_user: CurrentUser, from_kind: str,
+                             from_id: uuid.UUID, to_kind: str, to_id: uuid.UUID) -> Any:
+    source = await _node(session, from_kind, from_id)
+    target = await _node(session, to_kind, to_id)
+    path = city_graph.shortest_path(source, target)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No path between those nodes")
+    return GraphPath(nodes=[GraphNode(kind=kind, id=node_id) for kind, node_id in path], length=len(path) - 1)
+
+
+@router.get("/{kind}/{id}/neighbours", response_model=GraphNodes)
+async def read_neighbours(session: AsyncSessionDep, current_user: CurrentUser, kind: str, id: uuid.UUID,
+                          depth: int = 1, kinds: str | None = None) -> Any:
+    # kinds=tour,narrative keeps only those node kinds in the result - the walk itself goes through everything
+    if not 1 <= depth <= 4:
+        raise HTTPException(status_code=400, detail="Depth must be between 1 and 4")
+    node = await _node(session, kind, id)
+    wanted = set(_kinds(kinds))
+    distances = city_graph.k_hop(node, depth)
+    nodes = [
+        GraphNode(kind=other_kind, id=other_id, distance=distance)
+        for (other_kind, other_id), distance in sorted(distances.items(), key=lambda item: (item[1], item[0][0]))
+        if not wanted or other_kind in wanted
+    ]
+    return GraphNodes(nodes=nodes, count=len(nodes))
+
+
+@router.get("/{kind}/{id}/reach", response_model=GraphNodes)
+async def read_reach(session: AsyncSessionDep, current_user: CurrentUser, kind: str, id: uuid.UUID,
+                     via: str) -> Any:
+    # via=narrative,tour from a site: the tours linked to any narrative that touches the site
+    node = await _node(session, kind, id)
+    reached = city_graph.reach(node, _kinds(via))
+    nodes = [GraphNode(kind=other_kind, id=other_id) for other_kind, other_id in sorted(reached, key=str)]
+    return GraphNodes(nodes=nodes, count=len(nodes))
+
+
+@router.get("/{kind}/{id}/view")
+async def read_graph_view(session: AsyncSessionDep, current_user: CurrentUser, kind: str, id: uuid.UUID,
+                          depth: int = 2, format: ViewFormat = "json") -> Any:
+    # format=html gives a standalone interactive page, json the nodes/edges/positions for the frontend to draw
+    if not 1 <= depth <= 3:
+        raise HTTPException(status_code=400, detail="Depth must be between 1 and 3")
+    node = await _node(session, kind, id)
+    body, cached = await render_view(session, node, depth, format)
+    return Response(
+        content=body,
+        media_type="text/html" if format == "html" else "application/json",
+        headers={"X-Cache": "hit" if cached else "miss", "X-Graph-Version": str(city_graph.version)},
+    )
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy import text
+
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def get_liveness() -> Any:
+    # The process is up and the event loop is turning - nothing else, so a slow database never gets it restarted
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def get_readiness(request: Request) -> Any:
+    # Startup warm-up has finished and the database answers in time - otherwise take this instance out of rotation
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Starting up")
+
+    async def ping() -> None:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), settings.READINESS_TIMEOUT)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ok"}
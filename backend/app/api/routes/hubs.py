@@ -1,62 +1,51 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request
 
-from backend.app.api.deps import SessionDep, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.crud.spatial import bbox_filter
 from backend.app.models.models import Hub, HubCreate, HubsPublic, HubPublic
 
 router = APIRouter(prefix="/hubs", tags=["hubs"])
 
 
 @router.get("/", response_model=HubsPublic)
-def get_hubs(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_hubs(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                   cursor: str | None = None, bbox: str | None = None, fields: str | None = None) -> Any:
+    # bbox=west,south,east,north returns only the hubs whose boundary overlaps that viewport
+    filters = [bbox_filter(Hub, "hub", bbox)] if bbox else []
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Hub)
-        count = session.exec(count_statement).one()
-        statement = select(Hub).limit(limit)
-        hubs = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Hub)
-            .where(Hub.owner_id == current_user.id)
+        return await get_entity_list(
+            request, session, Hub, HubsPublic, "hubs", *filters, count_filters=filters, limit=limit, cursor=cursor, fields=fields
         )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Hub)
-            .where(Hub.owner_id == current_user.id)
-            .limit(limit)
-        )
-        hubs = session.exec(statement).all()
-
-    return HubsPublic(data=hubs, count=count)
+    return await get_entity_list(
+        request, session, Hub, HubsPublic, "hubs", Hub.owner_id == current_user.id, *filters,
+        owner_id=current_user.id, count_filters=filters, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.get("/{id}", response_model=HubPublic)
-def get_hub(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
-    hub = session.get(Hub, id)
-    if not hub:
-        raise HTTPException(status_code=404, detail="Hub not found")
-    if not current_user.is_superuser and (hub.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this hub")
+async def get_hub(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                  fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Hub, HubPublic, id, "Hub", fields=fields)
 
 
 @router.post("/", response_model=HubPublic)
-def create_hub(session: SessionDep, hub_in: HubCreate, current_user: CurrentUser) -> Any:
+async def create_hub(session: AsyncSessionDep, hub_in: HubCreate, current_user: CurrentUser) -> Any:
     hub = Hub.model_validate(hub_in, update={"owner_id": current_user.id})
     session.add(hub)
-    session.commit()
-    session.refresh(hub)
+    await session.commit()
+    await session.refresh(hub)
     return hub
 
 
 @router.delete("/{id}")
-def delete_hub(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
-    hub = session.get(Hub, id)
+async def delete_hub(session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
+    hub = await session.get(Hub, id)
     if not hub:
         raise HTTPException(status_code=404, detail="Hub not found")
     if not current_user.is_superuser and (hub.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this hub")
-    session.delete(hub)
\ No newline at end of file
+    await session.delete(hub)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi import APIRouter, UploadFile, File
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.crud.bulk_import import get_importable, import_rows, read_spreadsheet
+from backend.app.models.models import ImportReport
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+
+@router.post("/{entity}", response_model=ImportReport)
+async def import_entities(entity: str, session: AsyncSessionDep, current_user: CurrentUser,
+                          file: UploadFile = File(...), dry_run: bool = False) -> Any:
+    get_importable(entity)
+    frame = await run_in_threadpool(read_spreadsheet, file.filename or "", file.file)
+    return await import_rows(session, entity, frame, owner_id=current_user.id, dry_run=dry_run)
@@ -0,0 +1,40 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter
+
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.crud.links import LINK_MODELS, attach_links, detach_links, get_link_table, link_columns, \
+    replace_links
+from backend.app.models.models import LinkInfo, LinkPairs, LinkResult, LinkTargets
+
+router = APIRouter(prefix="/links", tags=["links"])
+
+
+@router.get("/", response_model=list[LinkInfo])
+async def get_links(current_user: CurrentUser) -> Any:
+    return [
+        LinkInfo(link=link, columns=[column.name for column in link_columns(model.__table__)])
+        for link, model in LINK_MODELS.items()
+    ]
+
+
+@router.post("/{link}/attach", response_model=LinkResult)
+async def attach(link: str, links_in: LinkPairs, session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    get_link_table(link)
+    affected = await attach_links(session, current_user, link, links_in.pairs) if links_in.pairs else 0
+    return LinkResult(link=link, affected=affected)
+
+
+@router.post("/{link}/detach", response_model=LinkResult)
+async def detach(link: str, links_in: LinkPairs, session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    get_link_table(link)
+    affected = await detach_links(session, current_user, link, links_in.pairs) if links_in.pairs else 0
+    return LinkResult(link=link, affected=affected)
+
+
+@router.put("/{link}/{left_id}", response_model=LinkResult)
+async def replace(link: str, left_id: uuid.UUID, targets_in: LinkTargets, session: AsyncSessionDep,
+                  current_user: CurrentUser) -> Any:
+    affected = await replace_links(session, current_user, link, left_id, targets_in.ids)
+    return LinkResult(link=link, affected=affected)
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
 from backend.app.crud import crud
-from backend.app.api.deps import CurrentUser, SessionDep
+from backend.app.api.deps import CurrentUser, AsyncSessionDep
 from backend.app.core import security
 from backend.app.core.config import settings
 from backend.app.models.models import Token, UserPublic
@@ -15,8 +15,8 @@ router = APIRouter(prefix="/login", tags=["login"])
 
 
 @router.post("/access-token")
-def login_access_token(session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> Token:
-    user = crud.authenticate_user(session=session, email=form_data.username, passwd=form_data.password)
+async def login_access_token(session: AsyncSessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> Token:
+    user = await crud.authenticate_user(session=session, email=form_data.username, passwd=form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Authentication failed - invalid credentials")
     elif not user.is_active:
@@ -27,5 +27,5 @@ def login_access_token(session: SessionDep, form_data: Annotated[OAuth2PasswordR
 
 
 @router.post("/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: CurrentUser) -> Any:
     return current_user
\ No newline at end of file
@@ -0,0 +1,70 @@
+import secrets
+from typing import Optional
+
+import anyio.to_thread
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine, pool_stats
+from backend.app.core.metrics import render_metric, request_duration, request_state
+from backend.app.core.security import password_hasher
+
+router = APIRouter(tags=["metrics"])
+
+
+def _check_access(authorization: Optional[str]) -> None:
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_TOKEN is not None and not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+
+@router.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def get_metrics(authorization: Optional[str] = Header(None)) -> PlainTextResponse:
+    _check_access(authorization)
+    # Sync routes and run_in_threadpool calls share this limiter - tasks_waiting above zero means the threadpool
+    # is saturated and requests are queueing for a thread
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    pool = async_engine.pool
+
+    lines = [
+        *request_duration.render(),
+        *render_metric("narvis_http_requests_in_flight", "gauge", "Requests currently being handled.",
+                       [({}, request_state.in_flight)]),
+        *render_metric("narvis_threadpool_threads", "gauge", "Threadpool tokens by state.", [
+            ({"state": "busy"}, limiter.borrowed_tokens),
+            ({"state": "limit"}, limiter.total_tokens),
+        ]),
+        *render_metric("narvis_threadpool_waiting", "gauge", "Tasks waiting for a threadpool thread.",
+                       [({}, limiter.statistics().tasks_waiting)]),
+        *render_metric("narvis_db_pool_connections", "gauge", "Database pool connections by state.", [
+            ({"state": "checked_out"}, pool.checkedout()),
+            ({"state": "checked_in"}, pool.checkedin()),
+            ({"state": "overflow"}, max(pool.overflow(), 0)),
+            ({"state": "size"}, pool.size()),
+            ({"state": "max_overflow"}, settings.DB_MAX_OVERFLOW),
+        ]),
+        *render_metric("narvis_db_pool_checkouts_total", "counter", "Connections checked out of the pool.",
+                       [({}, pool_stats.checkouts)]),
+        *render_metric("narvis_db_pool_connection_events_total", "counter", "Physical connection lifecycle events.", [
+            ({"event": "opened"}, pool_stats.connections_opened),
+            ({"event": "closed"}, pool_stats.connections_closed),
+            ({"event": "invalidated"}, pool_stats.connections_invalidated),
+        ]),
+        *render_metric("narvis_db_pool_wait_seconds_total", "counter", "Time requests spent waiting for a connection.",
+                       [({}, pool_stats.wait_total)]),
+        *render_metric("narvis_db_pool_waits_total", "counter", "Connection waits measured.",
+                       [({}, pool_stats.wait_count)]),
+        *render_metric("narvis_password_hash_operations", "gauge", "Password hashing operations by state.", [
+            ({"state": "in_flight"}, password_hasher.in_flight),
+            ({"state": "queued"}, password_hasher.queue_depth),
+            ({"state": "workers"}, password_hasher.workers),
+            ({"state": "max_queue"}, password_hasher.max_queue),
+        ]),
+        *render_metric("narvis_password_hash_rejected_total", "counter", "Hashing requests turned away with a 503.",
+                       [({}, password_hasher.rejected)]),
+    ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,71 +1,76 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
 
-from backend.app.api.deps import SessionDep, CurrentUser
-from backend.app.models.models import Narrative, NarrativesPublic, NarrativePublic, NarrativeCreate
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.models.models import Narrative, NarrativesPublic, NarrativePublic, NarrativeCreate, NarrativeGraph
 
 router = APIRouter(prefix="/narratives", tags=["narratives"])
 
 
 @router.get("/", response_model=NarrativesPublic)
-def get_narratives(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
-
+async def get_narratives(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                         cursor: str | None = None, fields: str | None = None) -> Any:
     if current_user.is_superuser:
-        # TODO: Abstract this logic to a crud method!
-        # Needs error handling etc
-        count_statement = select(func.count()).select_from(Narrative)
-        count = session.exec(count_statement).one()
-        statement = select(Narrative).limit(limit)
-        narratives = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Narrative)
-            .where(Narrative.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Narrative)
-            .where(Narrative.owner_id == current_user.id)
-            .limit(limit)
+        return await get_entity_list(
+            request, session, Narrative, NarrativesPublic, "narratives", limit=limit, cursor=cursor, fields=fields
         )
-        narratives = session.exec(statement).all()
-
-    return NarrativesPublic(data=narratives, count=count)
+    return await get_entity_list(
+        request, session, Narrative, NarrativesPublic, "narratives", Narrative.owner_id == current_user.id,
+        owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.get("/{id}", response_model=NarrativePublic)
-def get_narrative(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
-
-    narrative = session.get(Narrative, id)
+async def get_narrative(request: Request, session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID,
+                        fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Narrative, NarrativePublic, id, "Narrative", fields=fields)
+
+
+@router.get("/{id}/graph", response_model=NarrativeGraph)
+async def get_narrative_graph(session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+    # One query for the narrative plus one IN (...) query per relationship - the query count doesn't grow with the subtree
+    statement = (
+        select(Narrative)
+        .where(Narrative.id == id)
+        .options(
+            selectinload(Narrative.substories),
+            selectinload(Narrative.artefacts),
+            selectinload(Narrative.sites),
+            selectinload(Narrative.tours),
+            selectinload(Narrative.experiences),
+        )
+    )
+    narrative = (await session.exec(statement)).first()
     if not narrative:
         raise HTTPException(status_code=404, detail=f"Narrative with id {id} not found")
-    if not current_user.is_superuser and (narrative.owner_id != current_user.id):
+    if not current_user.is_superuser and getattr(narrative, "owner_id", None) != current_user.id:
         raise HTTPException(status_code=400, detail="No permission to access this narrative")
-    return narrative
+    return NarrativeGraph.model_validate(narrative, from_attributes=True)
 
 
 @router.post("/", response_model=NarrativePublic)
-def create_narrative(session: SessionDep, current_user: CurrentUser, narrative_in: NarrativeCreate) -> Any:
+async def create_narrative(session: AsyncSessionDep, current_user: CurrentUser, narrative_in: NarrativeCreate) -> Any:
     narrative = Narrative.model_validate(narrative_in, update={"owner_id": current_user.id})
     session.add(narrative)
-    session.commit()
-    session.refresh(narrative)
+    await session.commit()
+    await session.refresh(narrative)
     return narrative
 
 
 @router.delete("/{id}")
-def delete_narrative(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
-    narrative = session.get(Narrative, id)
+async def delete_narrative(session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID) -> str:
+    narrative = await session.get(Narrative, id)
     if not narrative:
         raise HTTPException(status_code=404, detail=f"Narrative with id {id} not found")
     if not current_user.is_superuser and (narrative.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this narrative")
-    session.delete(narrative)
-    session.commit()
+    await session.delete(narrative)
+    await session.commit()
     return f"Narrative: {id} deleted successfully"
 
 
@@ -0,0 +1,25 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.app.api.deps import AsyncSessionDep, CurrentUser
+from backend.app.crud.search import SEARCHABLE, search
+from backend.app.models.models import SearchHit, SearchResults
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/", response_model=SearchResults)
+async def search_entities(session: AsyncSessionDep, current_user: CurrentUser, q: str = Query(min_length=1),
+                          types: str | None = None, limit: int = 20) -> Any:
+    # types=narrative,artefact narrows the search - default is every searchable type
+    search_types = [search_type.strip() for search_type in types.split(",")] if types else list(SEARCHABLE)
+    unknown = [search_type for search_type in search_types if search_type not in SEARCHABLE]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Can't search {', '.join(unknown)} - expected {', '.join(SEARCHABLE)}")
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+
+    rows = await search(session, q, search_types, limit)
+    hits = [SearchHit(type=row.type, id=row.id, name=row.name, rank=row.rank, highlight=row.highlight) for row in rows]
+    return SearchResults(hits=hits, count=len(hits))
@@ -1,10 +1,11 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from backend.app.api.deps import SessionDep, get_current_active_superuser, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser, CurrentUser
+from backend.app.crud.spatial import bbox_filter
 
 from backend.app.models.models import Site, SiteBase, SitePublic, SitesPublic, SiteCreate
 
@@ -12,54 +13,41 @@ router = APIRouter(prefix="/sites", tags=["sites"])
 
 
 @router.get("/{id}", response_model=SitePublic)
-def get_site(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
-    site = session.get(Site, id)
-    if not site:
-        raise HTTPException(status_code=404, detail="Site not found")
-    if not current_user.is_superuser and (site.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="No permission to access this site")
-    return site
+async def get_site(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                   fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Site, SitePublic, id, "Site", fields=fields)
 
 @router.get("/", response_model=SitesPublic)
-def get_sites(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
+async def get_sites(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                    cursor: str | None = None, bbox: str | None = None, fields: str | None = None) -> Any:
+    # bbox=west,south,east,north returns only the sites whose boundary overlaps that viewport
+    filters = [bbox_filter(Site, "site", bbox)] if bbox else []
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Site)
-        count = session.exec(count_statement).one()
-        statement = select(Site).limit(limit)
-        sites = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Site)
-            .where(Site.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Site)
-            .where(Site.owner_id == current_user.id)
-            .limit(limit)
+        return await get_entity_list(
+            request, session, Site, SitesPublic, "sites", *filters, count_filters=filters, limit=limit, cursor=cursor, fields=fields
         )
-        sites = session.exec(statement).all()
-
-    return SitesPublic(data=sites, count=count)
+    return await get_entity_list(
+        request, session, Site, SitesPublic, "sites", Site.owner_id == current_user.id, *filters,
+        owner_id=current_user.id, count_filters=filters, limit=limit, cursor=cursor, fields=fields,
+    )
 
 
 @router.post("/", response_model=SitePublic)
-def create_site(session: SessionDep, site_in: SiteCreate, current_user: CurrentUser) -> Any:
+async def create_site(session: AsyncSessionDep, site_in: SiteCreate, current_user: CurrentUser) -> Any:
     site = Site.model_validate(site_in, update={"owner_id": current_user.id})
     session.add(site)
-    session.commit()
-    session.refresh(site)
+    await session.commit()
+    await session.refresh(site)
     return site
 
 
 @router.delete("/{id}")
-def delete_site(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> str:
-    site = session.get(Site, id)
+async def delete_site(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> str:
+    site = await session.get(Site, id)
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     if not current_user.is_superuser and (site.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this site")
-    session.delete(site)
-    session.commit()
+    await session.delete(site)
+    await session.commit()
     return f"Site: {id} deleted successfully"
\ No newline at end of file
@@ -1,64 +1,69 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from backend.app.api.deps import SessionDep, get_current_active_superuser, CurrentUser
+from backend.app.api.conditional import get_entity, get_entity_list
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser, CurrentUser
 
-from backend.app.models.models import Tour, TourCreate, TourPublic, ToursPublic
+from backend.app.models.models import Tour, TourCreate, TourPublic, TourRoute, ToursPublic
+from backend.app.services.tour_routes import get_route, optimise_route
 
 router = APIRouter(prefix="/tours", tags=["tours"])
 
 
 @router.get("/{id}", response_model=TourPublic)
-def get_tour(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
-    tour = session.get(Tour, id)
+async def get_tour(request: Request, id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser,
+                   fields: str | None = None) -> Any:
+    return await get_entity(request, session, current_user, Tour, TourPublic, id, "Tour", fields=fields)
+
+
+@router.get("/", response_model=ToursPublic)
+async def get_tours(request: Request, session: AsyncSessionDep, current_user: CurrentUser, limit: int = 100,
+                    cursor: str | None = None, fields: str | None = None) -> Any:
+    if current_user.is_superuser:
+        return await get_entity_list(request, session, Tour, ToursPublic, "tours", limit=limit, cursor=cursor, fields=fields)
+    return await get_entity_list(
+        request, session, Tour, ToursPublic, "tours", Tour.owner_id == current_user.id,
+        owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields,
+    )
+
+
+@router.get("/{id}/route", response_model=TourRoute)
+async def get_tour_route(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    tour = await session.get(Tour, id)
     if not tour:
         raise HTTPException(status_code=404, detail="Tour not found")
-    if not current_user.is_superuser and (tour.owner_id != current_user.id):
+    if not current_user.is_superuser and getattr(tour, "owner_id", None) != current_user.id:
         raise HTTPException(status_code=400, detail="No permission to access this tour")
-    return tour
+    return await get_route(session, tour)
 
 
-@router.get("/", response_model=ToursPublic)
-def get_tours(session: SessionDep, current_user: CurrentUser, limit: int = 100) -> Any:
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Tour)
-        count = session.exec(count_statement).one()
-        statement = select(Tour).limit(limit)
-        tours = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Tour)
-            .where(Tour.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Tour)
-            .where(Tour.owner_id == current_user.id)
-            .limit(limit)
-        )
-        tours = session.exec(statement).all()
-
-    return ToursPublic(data=tours, count=count)
+@router.post("/{id}/route", response_model=TourRoute)
+async def optimise_tour_route(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> Any:
+    # Orders the linked sites and fills in tour_length/tour_time - unchanged site sets come from the route cache
+    tour = await session.get(Tour, id)
+    if not tour:
+        raise HTTPException(status_code=404, detail="Tour not found")
+    if not current_user.is_superuser and getattr(tour, "owner_id", None) != current_user.id:
+        raise HTTPException(status_code=400, detail="No permission to update this tour")
+    return await optimise_route(session, tour)
 
 
 @router.post("/", response_model=TourPublic)
-def create_tour(session: SessionDep, tour_in: TourCreate, current_user: CurrentUser) -> Any:
+async def create_tour(session: AsyncSessionDep, tour_in: TourCreate, current_user: CurrentUser) -> Any:
     tour = Tour.model_validate(tour_in, update={"owner_id": current_user.id})
     session.add(tour)
-    session.commit()
-    session.refresh(tour)
+    await session.commit()
+    await session.refresh(tour)
     return tour
 
 
 @router.delete("/{id}")
-def delete_tour(id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> str:
-    tour = session.get(Tour, id)
+async def delete_tour(id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser) -> str:
+    tour = await session.get(Tour, id)
     if not tour:
         raise HTTPException(status_code=404, detail="Tour not found")
     if not current_user.is_superuser and (tour.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="No permission to delete this tour")
-    session.delete(tour)
\ No newline at end of file
+    await session.delete(tour)
\ No newline at end of file
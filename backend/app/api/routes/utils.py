@@ -0,0 +1,38 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+
+from backend.app.api.deps import AsyncSessionDep, get_current_active_superuser
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine, pool_stats
+from backend.app.core.security import password_hasher
+from backend.app.models.models import DBPoolStats, PasswordHashStats
+
+router = APIRouter(prefix="/utils", tags=["utils"])
+
+
+@router.get("/db-pool", dependencies=[Depends(get_current_active_superuser)], response_model=DBPoolStats)
+async def get_db_pool_stats(session: AsyncSessionDep) -> Any:
+    max_connections = (await session.execute(text("SHOW max_connections"))).scalar()
+    connections = (await session.execute(
+        text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+    )).scalar()
+
+    return DBPoolStats(
+        **pool_stats.snapshot(async_engine.pool),
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        postgres_max_connections=int(max_connections),
+        postgres_connections=connections,
+    )
+
+
+@router.get("/password-hashing", dependencies=[Depends(get_current_active_superuser)], response_model=PasswordHashStats)
+async def get_password_hash_stats() -> Any:
+    return PasswordHashStats(
+        workers=password_hasher.workers,
+        max_queue=password_hasher.max_queue,
+        in_flight=password_hasher.in_flight,
+        queue_depth=password_hasher.queue_depth,
+        rejected=password_hasher.rejected,
+    )
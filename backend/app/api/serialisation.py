@@ -0,0 +1,58 @@
+import uuid
+from typing import Any, Optional, get_args
+
+import orjson
+from fastapi import HTTPException
+from sqlmodel import SQLModel
+
+
+""" FAST JSON """
+# List pages are built straight from row tuples and encoded with orjson. The selected columns are exactly the
+# public model's fields, so validating ORM objects against response_model and encoding the result with the
+# stdlib json module (FastAPI's default path) only costs time - see backend/benchmarks/serialisation.py.
+# fields= narrows the SELECT itself, so map views that only want names and boundaries never read the wide
+# description/documentation columns.
+
+def item_model(list_model: type[SQLModel], key: str) -> type[SQLModel]:
+    """The public model of a list response, e.g. SitePublic for SitesPublic.sites."""
+    return get_args(list_model.model_fields[key].annotation)[0]
+
+
+def select_fields(public_model: type[SQLModel], fields: Optional[str] = None) -> list[str]:
+    """Parses fields=name,status,... against the public model - every field when it isn't given."""
+    names = list(public_model.model_fields)
+    if not fields:
+        return names
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in public_model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {', '.join(unknown)} - expected any of {', '.join(names)}")
+    # id is always returned - it's what the client needs for the next request
+    return ["id", *(name for name in dict.fromkeys(requested) if name != "id")]
+
+
+def public_columns(model: Any, public_model: type[SQLModel], fields: Optional[str] = None) -> list[Any]:
+    """The table columns behind the selected public fields, so unselected (wide) columns are never read."""
+    table = model.__table__
+    return [table.c[name] for name in select_fields(public_model, fields)]
+
+
+def _default(value: Any) -> Any:
+    # asyncpg hands back its own UUID subclass, which orjson's native uuid support doesn't pick up
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode_item(names: list[str], row: tuple) -> bytes:
+    return orjson.dumps(dict(zip(names, row)), default=_default)
+
+
+def encode_page(key: str, names: list[str], rows: list[tuple], **fields: Any) -> bytes:
+    # orjson writes NaN as null rather than invalid JSON, like the pydantic path
+    return orjson.dumps({key: [dict(zip(names, row)) for row in rows], **fields}, default=_default)
+
+
+def encode_lines(names: list[str], rows: list[tuple]) -> bytes:
+    """NDJSON - one object per row, each followed by a newline."""
+    return b"".join(orjson.dumps(dict(zip(names, row)), default=_default, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
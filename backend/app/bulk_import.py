@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.app.core.db import async_engine
+from backend.app.crud import crud
+from backend.app.crud.bulk_import import IMPORTABLE, import_rows, read_spreadsheet
+from backend.app.models.models import ImportReport
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(entity: str, path: str, owner_email: str | None, dry_run: bool) -> ImportReport:
+    frame = read_spreadsheet(path, path)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        owner_id = None
+        if owner_email:
+            owner = await crud.get_user_by_email(session, owner_email)
+            if not owner:
+                raise SystemExit(f"No user with email {owner_email}")
+            owner_id = owner.id
+        report = await import_rows(session, entity, frame, owner_id=owner_id, dry_run=dry_run)
+    await async_engine.dispose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import sites, artefacts or narratives from a .csv/.xlsx file")
+    parser.add_argument("entity", choices=sorted(IMPORTABLE))
+    parser.add_argument("path")
+    parser.add_argument("--owner-email", help="User that will own the imported rows")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, don't write anything")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = asyncio.run(run(args.entity, args.path, args.owner_email, args.dry_run))
+    logger.info(
+        "Imported %s of %s %s in %.2fs (%s failed)",
+        report.rows_imported, report.rows_total, args.entity, time.perf_counter() - started, report.rows_failed,
+    )
+    for row_error in report.errors:
+        logger.warning("Row %s: %s", row_error.row, "; ".join(row_error.errors))
+    sys.exit(1 if report.rows_failed else 0)
+
+
+if __name__ == "__main__":
+    main()
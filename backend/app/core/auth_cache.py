@@ -0,0 +1,52 @@
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.models.models import User
+
+
+# token -> user id (sub), so repeat requests skip jwt.decode
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+# user id -> User loaded by an earlier request, so repeat requests skip session.get
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+_AUTH_FLAGS = ("is_active", "is_superuser")
+
+
+def invalidate_user(user_id: Any) -> None:
+    user_cache.pop(str(user_id))
+
+
+def _pending_invalidations(session: OrmSession) -> set:
+    return session.info.setdefault("auth_cache_invalidate", set())
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_user_changes(session: OrmSession, flush_context: Any) -> None:
+    # Deleted users and users whose active/superuser flags changed must not be served from the cache
+    for instance in session.deleted:
+        if isinstance(instance, User):
+            _pending_invalidations(session).add(instance.id)
+    for instance in session.dirty:
+        if isinstance(instance, User):
+            state = inspect(instance)
+            if any(state.attrs[flag].history.has_changes() for flag in _AUTH_FLAGS):
+                _pending_invalidations(session).add(instance.id)
+
+    # Drop now as well as after commit, so a concurrent request can't keep an entry alive across the change
+    for user_id in session.info.get("auth_cache_invalidate", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _apply_user_changes(session: OrmSession) -> None:
+    for user_id in session.info.pop("auth_cache_invalidate", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_user_changes(session: OrmSession) -> None:
+    session.info.pop("auth_cache_invalidate", None)
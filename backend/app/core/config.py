@@ -1,20 +1,14 @@
 import secrets
 import os
-from typing import Self
+from typing import Literal, Optional, Self
 
 from pydantic import computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic_core import MultiHostUrl
 
-# TODO: Pain in the arse - will need to be fixed but later issue...
-env_file_path = '/home/koro/PycharmProjects/narvis/.env'
-if os.path.exists(env_file_path):
-    print(f".env file found at: {os.path.abspath(env_file_path)}")
-    with open(env_file_path, 'r') as f:
-        first_line = f.readline().strip()
-        print(f"First line of .env: {first_line}")
-else:
-    print(f".env file not found sat: {os.path.abspath(env_file_path)}")
+# The .env at the repository root unless ENV_FILE points elsewhere - a missing file is fine, settings then come
+# from the environment alone
+env_file_path = os.environ.get("ENV_FILE", os.path.join(os.path.dirname(__file__), "..", "..", "..", ".env"))
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -35,7 +29,85 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
+    ENVIRONMENT: Literal["local", "production"] = "local"
 
+    # Connection pool - size it so (workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)) stays under Postgres max_connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: Optional[bool] = None # unset -> statement logging only in the local environment
+
+    # Password hashing - bcrypt cost, size of the hashing process pool and how many requests may queue for it
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Rows per COPY batch for spreadsheet imports
+    BULK_IMPORT_CHUNK_SIZE: int = 10000
+
+    # In-process cache of decoded tokens and resolved users for get_current_user
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    # Global list counts come from planner statistics once a table passes this many rows - 0 keeps them exact
+    APPROXIMATE_COUNT_THRESHOLD: int = 0
+
+    # Load the in-memory city graph in the background at startup rather than on the first graph request
+    GRAPH_PRELOAD: bool = True
+    # Rendered graph views are cached per graph version; big neighbourhoods are cut down to the nearest nodes
+    GRAPH_VIEW_MAX_NODES: int = 500
+    GRAPH_VIEW_CACHE_SIZE: int = 256
+    GRAPH_VIEW_CACHE_TTL_SECONDS: int = 3600
+
+    # Tour routes - tour_time is tour_length at this pace, in minutes
+    TOUR_WALKING_SPEED_KMH: float = 4.5
+    TOUR_ROUTE_CACHE_SIZE: int = 1024
+
+    # Portfolio analytics are cached until a write to the tables they read - the TTL covers other workers' writes
+    PORTFOLIO_CACHE_TTL_SECONDS: int = 300
+
+    # Serialised GET responses, keyed by row versions - entries never go stale, the TTL only bounds memory
+    RESPONSE_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+
+    # Rows fetched per round trip from the server-side cursor behind NDJSON exports
+    EXPORT_BATCH_SIZE: int = 2000
+
+    # Artefact media - content-addressed files under MEDIA_ROOT, read and written MEDIA_CHUNK_SIZE bytes at a time
+    MEDIA_ROOT: str = "backend/media"
+    MEDIA_CHUNK_SIZE: int = 1024 * 1024
+    # Set when a reverse proxy serves MEDIA_ROOT at this internal location (nginx: X-Accel-Redirect) - downloads
+    # are then handed off to the proxy's sendfile instead of being streamed through the app
+    MEDIA_ACCEL_REDIRECT: Optional[str] = None
+
+    # Query instrumentation - statements slower than SLOW_QUERY_MS are logged, as is any statement a single request
+    # sends N_PLUS_ONE_THRESHOLD times or more; SERVER_TIMING adds per-request query count and DB time to responses
+    SLOW_QUERY_MS: float = 200.0
+    N_PLUS_ONE_THRESHOLD: int = 10
+    SERVER_TIMING: bool = True
+
+    # Prometheus /metrics - request latency histogram buckets in seconds; when METRICS_TOKEN is set scrapers must
+    # send it as a bearer token, otherwise keep the endpoint off the public internet at the proxy
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    METRICS_LATENCY_BUCKETS: list[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    # Startup - Postgres is retried with exponential backoff (capped at DB_STARTUP_MAX_BACKOFF seconds between
+    # attempts) for up to DB_STARTUP_TIMEOUT, then DB_POOL_WARM connections are opened before traffic is accepted.
+    # /health/ready fails when a SELECT 1 takes longer than READINESS_TIMEOUT
+    DB_STARTUP_TIMEOUT: float = 60.0
+    DB_STARTUP_MAX_BACKOFF: float = 5.0
+    DB_POOL_WARM: int = 5
+    READINESS_TIMEOUT: float = 2.0
+
+
+    @property
+    def SQL_ECHO(self) -> bool:
+        if self.DB_ECHO is not None:
+            return self.DB_ECHO
+        return self.ENVIRONMENT == "local"
 
     @computed_field
     @property
@@ -49,5 +121,17 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URI(self) -> MultiHostUrl:
+        return MultiHostUrl.build(
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
 
 settings = Settings()
\ No newline at end of file
@@ -1,18 +1,139 @@
+import asyncio
+import hashlib
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from tenacity import AsyncRetrying, before_sleep_log, stop_after_delay, wait_exponential_jitter
 import logging
 from backend.app.core.config import settings
+from backend.app.core.migrations import MIGRATIONS, run_migrations
+from backend.app.core.pool_stats import instrument_pool
+from backend.app.core.query_stats import instrument_queries
 from backend.app.crud import crud
+from backend.app.crud.counts import rebuild_counts
 from backend.app.models.models import User, UserCreate
 
-engine = create_engine(str(settings.DATABASE_URI), echo=True)
+pool_options = dict(
+    echo=settings.SQL_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# Sync engine is kept for the standalone scripts (db_connection_check etc.), requests go through async_engine
+engine = create_engine(str(settings.DATABASE_URI), **pool_options)
+async_engine = create_async_engine(str(settings.ASYNC_DATABASE_URI), **pool_options)
+pool_stats = instrument_pool(async_engine.sync_engine)
+instrument_queries(async_engine.sync_engine)
 
 logger = logging.getLogger(__name__)
 
-def init_db(session: Session) -> None:
+def _add_missing_columns(connection: Connection) -> None:
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                logger.info(f"Adding column {table.name}.{column.name}")
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}'))
+
+
+def _create_missing_indexes(connection: Connection) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def wait_for_db() -> None:
+    """SELECT 1 until Postgres answers, backing off exponentially (with jitter) for up to DB_STARTUP_TIMEOUT."""
+    async for attempt in AsyncRetrying(
+        stop=stop_after_delay(settings.DB_STARTUP_TIMEOUT),
+        wait=wait_exponential_jitter(initial=0.1, max=settings.DB_STARTUP_MAX_BACKOFF),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    ):
+        with attempt:
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+
+async def warm_up() -> None:
+    """Opens pool connections and configures the mappers before the first request, so it doesn't pay for either."""
+    configure_mappers()
+
+    # All opened at once and held until the last one is open - opened one after another they'd all be the same one
+    connections = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(min(settings.DB_POOL_WARM, settings.DB_POOL_SIZE)))
+    )
+    try:
+        for connection in connections:
+            # The first statement on an asyncpg connection also loads its type codecs
+            await connection.execute(text("SELECT 1"))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL the models compile to plus the migration versions - changes whenever init_db has work to do."""
+    dialect = async_engine.dialect
+    ddl = [str(CreateTable(table).compile(dialect=dialect)) for table in SQLModel.metadata.sorted_tables]
+    ddl += [
+        str(CreateIndex(index).compile(dialect=dialect))
+        for table in SQLModel.metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+    ddl += [f"migration {version}" for version, _, _ in MIGRATIONS]
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
+
+
+async def _stored_fingerprint() -> str | None:
+    async with async_engine.connect() as connection:
+        if (await connection.execute(text("SELECT to_regclass('schema_state')"))).scalar() is None:
+            return None
+        return (await connection.execute(text("SELECT fingerprint FROM schema_state WHERE id = 1"))).scalar()
+
+
+async def _store_fingerprint(fingerprint: str) -> None:
+    async with async_engine.begin() as connection:
+        await connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_state ("
+            "id integer PRIMARY KEY, fingerprint varchar(64) NOT NULL, updated_at timestamptz NOT NULL DEFAULT now())"
+        ))
+        await connection.execute(text(
+            "INSERT INTO schema_state (id, fingerprint) VALUES (1, :fingerprint) "
+            "ON CONFLICT (id) DO UPDATE SET fingerprint = excluded.fingerprint, updated_at = now()"
+        ), {"fingerprint": fingerprint})
+
+
+async def _sync_schema() -> None:
     logger.info("Creating tables")
-    SQLModel.metadata.create_all(engine)
+    async with async_engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+        # create_all skips tables that already exist, so columns added to existing models are created here
+        await connection.run_sync(_add_missing_columns)
+    # Indexes on existing tables are built CONCURRENTLY by the migrations before the catch-all below can get to them
+    await run_migrations(async_engine)
+    async with async_engine.begin() as connection:
+        await connection.run_sync(_create_missing_indexes)
+
 
-    user = session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER)).first()
+async def init_db(session: AsyncSession) -> None:
+    # Schema sync inspects every table - skipped when the models and migrations haven't changed since the last
+    # successful run. Delete the schema_state row to force a full sync (e.g. after changing the schema by hand)
+    fingerprint = schema_fingerprint()
+    schema_current = await _stored_fingerprint() == fingerprint
+    if schema_current:
+        logger.info("Schema is current - skipping schema sync")
+    else:
+        await _sync_schema()
+
+    user = (await session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER))).first()
     if not user:
         user_in = UserCreate(
             email=settings.FIRST_SUPERUSER,
@@ -20,4 +141,10 @@ def init_db(session: Session) -> None:
             is_superuser=True,
         )
 
-        user = crud.create_db_user(session=session, user_create=user_in)
\ No newline at end of file
+        user = await crud.create_db_user(session=session, user_create=user_in)
+
+    if not schema_current:
+        # Counters are kept up to date by the write paths - they only need seeding for new tables
+        logger.info("Seeding row counters")
+        await rebuild_counts(session)
+        await _store_fingerprint(fingerprint)
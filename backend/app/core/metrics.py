@@ -0,0 +1,114 @@
+import bisect
+import time
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.core.config import settings
+
+
+""" METRICS """
+# Prometheus text exposition, written by hand - the few metric types needed here are cheaper to keep as plain
+# counters than to pull in a client library. Everything is updated on the event loop thread, so there are no locks.
+# Each worker process keeps its own numbers: scrape every worker, or run a single worker per container.
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values. observe() is a bisect and two additions."""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = sorted(buckets)
+        # label values -> [per-bucket counts (the last one is +Inf), sum]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, label_values: tuple, value: float) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _number(bound)
+                yield f"{self.name}_bucket{_labels((*self.label_names, 'le'), (*label_values, le))} {cumulative}"
+            labels = _labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render_metric(name: str, kind: str, help: str, samples: Iterable[tuple[dict[str, Any], float]]) -> Iterable[str]:
+    """A gauge or counter family from (labels, value) samples."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}"
+
+
+request_duration = Histogram(
+    "narvis_http_request_duration_seconds",
+    "Time from the request arriving to the response body being sent.",
+    ("method", "route", "status"),
+    settings.METRICS_LATENCY_BUCKETS,
+)
+
+
+class RequestState:
+    def __init__(self) -> None:
+        self.in_flight = 0
+
+
+request_state = RequestState()
+
+
+class MetricsMiddleware:
+    """Times every HTTP request into request_duration, labelled with the route template rather than the path so
+    ids don't create a series each. Requests that match no route share one "unmatched" label."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        request_state.in_flight += 1
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_state.in_flight -= 1
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe((scope["method"], route, status), time.perf_counter() - started)
@@ -0,0 +1,91 @@
+import logging
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+""" SCHEMA MIGRATIONS """
+# create_all only creates missing tables, and _add_missing_columns/_create_missing_indexes only add what a model
+# declares - fine for an empty table, but a plain CREATE INDEX on a big one blocks writes until it is built.
+# Changes to existing tables go here instead: numbered steps applied once each, in order, and recorded in
+# schema_migrations. They run in autocommit mode so indexes can be built CONCURRENTLY.
+# NOTE: keep each step in step with the models - a fresh database gets the same schema from create_all, and the
+# steps then find nothing left to do.
+
+logger = logging.getLogger(__name__)
+
+# Any constant - held for the duration of a run so two workers starting together don't both migrate
+MIGRATION_LOCK_ID = 72_616_401
+
+
+async def create_index(connection: AsyncConnection, name: str, table: str, *columns: str) -> None:
+    # A CONCURRENTLY build that fails (or is killed) leaves an INVALID index behind that IF NOT EXISTS would skip
+    invalid = (await connection.execute(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": name})).first()
+    if invalid:
+        await connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    await connection.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" ({column_list})'))
+
+
+async def _0001_owner_and_foreign_key_indexes(connection: AsyncConnection) -> None:
+    # Owner filtered list pages (WHERE owner_id = ? ORDER BY id)
+    await create_index(connection, "ix_experience_owner_id_id", "experience", "owner_id", "id")
+    await create_index(connection, "ix_experiencecomponent_owner_id_id", "experiencecomponent", "owner_id", "id")
+    # Foreign keys - joins from the parent side, and the checks Postgres makes when a parent row is deleted
+    await create_index(connection, "ix_experiencecomponent_experience_id", "experiencecomponent", "experience_id")
+    await create_index(connection, "ix_feasibility_experience_id", "feasibility", "experience_id")
+    await create_index(connection, "ix_substory_narrative_id", "substory", "narrative_id")
+    await create_index(connection, "ix_artefact_site_id", "artefact", "site_id")
+    # Second column of every link table - the primary key only serves lookups by the first
+    await create_index(connection, "ix_experiencesitelink_site_id", "experiencesitelink", "site_id")
+    await create_index(connection, "ix_sitenarrativelink_narrative_id", "sitenarrativelink", "narrative_id")
+    await create_index(connection, "ix_artefactnarrativelink_narrative_id", "artefactnarrativelink", "narrative_id")
+    await create_index(connection, "ix_narrativetourlink_tour_id", "narrativetourlink", "tour_id")
+    await create_index(connection, "ix_sitetourlink_tour_id", "sitetourlink", "tour_id")
+    await create_index(connection, "ix_sitehublink_hub_id", "sitehublink", "hub_id")
+    await create_index(connection, "ix_clusterhublink_hub_id", "clusterhublink", "hub_id")
+    await create_index(connection, "ix_experiencehublink_hub_id", "experiencehublink", "hub_id")
+    await create_index(connection, "ix_experienceclusterlink_cluster_id", "experienceclusterlink", "cluster_id")
+    await create_index(connection, "ix_experiencetourlink_tour_id", "experiencetourlink", "tour_id")
+    await create_index(connection, "ix_experiencenarrativelink_narrative_id", "experiencenarrativelink", "narrative_id")
+
+
+# (version, name, step) - append only; never renumber or edit a step that has shipped
+MIGRATIONS: list[tuple[int, str, Callable[[AsyncConnection], Awaitable[None]]]] = [
+    (1, "owner and foreign key indexes", _0001_owner_and_foreign_key_indexes),
+]
+
+
+async def applied_versions(connection: AsyncConnection) -> set[int]:
+    await connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version integer PRIMARY KEY, name varchar(255) NOT NULL, applied_at timestamptz NOT NULL DEFAULT now())"
+    ))
+    return set((await connection.execute(text("SELECT version FROM schema_migrations"))).scalars())
+
+
+async def run_migrations(engine: AsyncEngine) -> list[int]:
+    """Applies every pending step in order and returns the versions applied."""
+    applied = []
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            done = await applied_versions(connection)
+            for version, name, step in MIGRATIONS:
+                if version in done:
+                    continue
+                logger.info(f"Applying migration {version:04d}: {name}")
+                await step(connection)
+                await connection.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                    {"version": version, "name": name},
+                )
+                applied.append(version)
+        finally:
+            await connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    return applied
@@ -0,0 +1,89 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, SessionTransaction
+
+# Sessions connect lazily: a session's transaction is created just before it asks the pool for a connection, and
+# the pool's checkout event fires once it has one (after its connect event, if a new one had to be opened). The
+# time between the two is the wait. SQLAlchemy's greenlets share the calling task's context, so a request's
+# session and its checkout see the same variable.
+_checkout_started: ContextVar[Optional[float]] = ContextVar("_checkout_started", default=None)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _on_transaction_create(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        _checkout_started.set(time.perf_counter())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_transaction_end(session: Session, transaction: SessionTransaction) -> None:
+    # A transaction that never needed a connection (or one on an engine without these events) mustn't leave a
+    # start time behind for the next checkout
+    if transaction.parent is None:
+        _checkout_started.set(None)
+
+
+class PoolStats:
+    """Counters fed by pool events - cheap enough to leave on in production."""
+
+    def __init__(self) -> None:
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.checkouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.started_at = time.monotonic()
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_count += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def snapshot(self, pool: Any) -> dict[str, Any]:
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "connections_opened": self.connections_opened,
+            "connections_closed": self.connections_closed,
+            "connections_invalidated": self.connections_invalidated,
+            # New physical connections per minute - should sit near zero once the pool has warmed up
+            "connection_churn_per_minute": self.connections_opened / uptime * 60,
+            "wait_avg_ms": (self.wait_total / self.wait_count * 1000) if self.wait_count else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+def instrument_pool(engine: Engine) -> PoolStats:
+    stats = PoolStats()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        stats.connections_opened += 1
+
+    @event.listens_for(engine, "close")
+    def _on_close(dbapi_connection: Any, connection_record: Any) -> None:
+        stats.connections_closed += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        stats.connections_invalidated += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        stats.checkouts += 1
+        started = _checkout_started.get()
+        if started is not None:
+            _checkout_started.set(None)
+            stats.record_wait(time.perf_counter() - started)
+
+    return stats
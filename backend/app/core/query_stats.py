@@ -0,0 +1,124 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+import orjson
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.core.config import settings
+
+
+""" QUERY STATS """
+# Every statement is timed by engine events and charged to the request that sent it, found through a context
+# variable set by QueryStatsMiddleware (SQLAlchemy's greenlets share the calling task's context). Responses carry
+# the totals as a Server-Timing header, statements over SLOW_QUERY_MS go to a structured (JSON) log with the route,
+# and a request that sends the same normalised statement N_PLUS_ONE_THRESHOLD times or more is logged as an N+1.
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_LIST = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?(?:\s*,\s*\$\d+(?:::\w+(?:\[\])?)?)*")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_sql(statement: str) -> str:
+    """One line, with bind parameters (and expanded IN lists of them) and literals replaced by ?."""
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """The statements one request sent."""
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def route(self) -> str:
+        # Routing fills in scope["route"] before the endpoint runs - the template, not the path, so logs group
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries", total;dur={total:.2f}'
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _log(event_name: str, **fields: Any) -> None:
+    logger.warning(orjson.dumps({"event": event_name, **fields}).decode())
+
+
+def instrument_queries(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(connection: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        # Kept on the execution context rather than the connection - a statement that fails never reaches
+        # after_cursor_execute, and its start time goes away with its context instead of piling up
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(connection: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        stats = current_query_stats.get()
+        if stats is None and seconds * 1000 < settings.SLOW_QUERY_MS:
+            return
+        normalised = normalise_sql(statement)
+        if stats is not None:
+            stats.record(normalised, seconds)
+        if seconds * 1000 >= settings.SLOW_QUERY_MS:
+            _log(
+                "slow_query",
+                route=stats.route if stats is not None else None,
+                duration_ms=round(seconds * 1000, 2),
+                executemany=executemany,
+                sql=normalised,
+            )
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI so streamed bodies pass straight through - Server-Timing only covers the time up to the headers."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = current_query_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING:
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            for sql, count in stats.statements.items():
+                if count >= settings.N_PLUS_ONE_THRESHOLD:
+                    _log("repeated_query", route=stats.route, method=scope["method"], count=count, sql=sql)
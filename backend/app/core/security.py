@@ -1,10 +1,21 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
+from fastapi import HTTPException
 import jwt
-from typing import Any
+from typing import Any, Callable, Optional
 from backend.app.core.config import settings
 from datetime import datetime, timedelta, timezone
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default rounds so a change to BCRYPT_ROUNDS (up or down) marks old hashes for a rehash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def generate_token(entity: str | Any, alive_time: timedelta) -> str:
     expire_time = datetime.now(timezone.utc) + alive_time
@@ -17,5 +28,77 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+def _worker_ready() -> None:
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small process pool so hashing never holds the event loop or the request threadpool.
+    At most `workers` hashes run at once and `max_queue` more may wait - anything beyond that is rejected
+    straight away with a 503 instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.in_flight - self.workers, 0)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn rather than fork - the parent holds an event loop and open database connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many password operations in progress - try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def warm_up(self) -> None:
+        # Spawned workers start on demand and import this module first - start them now rather than on the first login
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._get_executor(), _worker_ready) for _ in range(self.workers)))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            # Waits for the workers to exit - uvicorn re-raises SIGTERM once shut down, so the interpreter's exit hook
+            # that would otherwise stop them never runs and they are left behind
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
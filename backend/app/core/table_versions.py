@@ -0,0 +1,53 @@
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+
+
+""" TABLE VERSIONS """
+# A per-table counter bumped whenever a transaction that wrote to the table commits. Caches of derived data key
+# themselves on the versions of the tables they read, so a write makes the next lookup miss without anyone having
+# to know which caches exist.
+# NOTE: versions are per process - caches that must see other workers' writes need a TTL as well.
+# NOTE: bulk statements that bypass the ORM must call record_table_writes themselves.
+
+table_versions: Counter = Counter()
+
+
+def versions(*table_names: str) -> tuple[int, ...]:
+    return tuple(table_versions[table_name] for table_name in table_names)
+
+
+def _written(session: OrmSession) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+def record_table_writes(session: OrmSession, *table_names: str) -> None:
+    _written(session).update(table_names)
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_written_tables(session: OrmSession, flush_context: Any) -> None:
+    written = _written(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, "__table__", None)
+        if table is None:
+            continue
+        written.add(table.name)
+        # Collection changes on many:many relationships are written to the link table, not as link instances
+        state = inspect(instance)
+        for relationship in state.mapper.relationships:
+            if relationship.secondary is not None and state.attrs[relationship.key].history.has_changes():
+                written.add(relationship.secondary.name)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _bump_table_versions(session: OrmSession) -> None:
+    for table_name in session.info.pop("written_tables", ()):
+        table_versions[table_name] += 1
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_written_tables(session: OrmSession) -> None:
+    session.info.pop("written_tables", None)
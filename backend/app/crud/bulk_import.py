@@ -0,0 +1,122 @@
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.table_versions import record_table_writes
+from backend.app.crud.counts import ALL_OWNERS, apply_count_deltas
+from backend.app.models.models import Artefact, ArtefactCreate, ImportReport, ImportRowError, Narrative, \
+    NarrativeCreate, Site, SiteCreate
+from backend.app.services.city_graph import record_node_changes
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+""" BULK IMPORT """
+# Rows are validated against the same *Create models as the POST endpoints, then loaded with COPY in chunks
+# inside a single transaction - one round trip per chunk instead of an INSERT + commit + refresh per row.
+
+IMPORTABLE: dict[str, tuple[Any, Any]] = {
+    "sites": (Site, SiteCreate),
+    "artefacts": (Artefact, ArtefactCreate),
+    "narratives": (Narrative, NarrativeCreate),
+}
+
+
+def get_importable(entity: str) -> tuple[Any, Any]:
+    if entity not in IMPORTABLE:
+        raise HTTPException(status_code=404, detail=f"Can't import {entity} - expected one of {', '.join(IMPORTABLE)}")
+    return IMPORTABLE[entity]
+
+
+def read_spreadsheet(filename: str, source: BinaryIO | str) -> "pd.DataFrame":
+    # pandas is only needed here - imported on first use so it stays out of every worker's start up
+    import pandas as pd
+
+    # Everything is read as text and left to the models to coerce, so Excel doesn't turn card ids into floats
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".csv":
+        frame = pd.read_csv(source, dtype=str)
+    elif suffix in (".xlsx", ".xlsm"):
+        frame = pd.read_excel(source, dtype=str, engine="openpyxl")
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type {suffix or filename} - upload .csv or .xlsx")
+    frame.columns = [str(column).strip() for column in frame.columns]
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def validate_rows(frame: "pd.DataFrame", entity: str, owner_id: Optional[uuid.UUID]) -> tuple[list[tuple], list[str], list[ImportRowError]]:
+    """Returns (records ready for COPY, their column order, per-row errors)."""
+    table_model, create_model = get_importable(entity)
+    table = table_model.__table__
+    # Generated columns (e.g. search_vector) can't be written and server defaulted ones (version, updated_at) are
+    # left for Postgres to fill in
+    columns = [column.name for column in table.columns if column.computed is None and column.server_default is None]
+
+    records: list[tuple] = []
+    errors: list[ImportRowError] = []
+    # Row numbers match the spreadsheet - row 1 is the header
+    for row_number, row in enumerate(frame.to_dict("records"), start=2):
+        try:
+            item = create_model.model_validate(row)
+        except ValidationError as e:
+            errors.append(ImportRowError(
+                row=row_number,
+                errors=[f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()],
+            ))
+            continue
+        values = item.model_dump()
+        values["id"] = uuid.uuid4()
+        if "owner_id" in table.c:
+            values["owner_id"] = owner_id
+        records.append(tuple(values.get(column) for column in columns))
+    return records, columns, errors
+
+
+async def copy_records(session: AsyncSession, entity: str, records: list[tuple], columns: list[str]) -> None:
+    table_model, _ = get_importable(entity)
+    table = table_model.__table__
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    chunk_size = settings.BULK_IMPORT_CHUNK_SIZE
+    for start in range(0, len(records), chunk_size):
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name, records=records[start:start + chunk_size], columns=columns
+        )
+
+    # COPY bypasses the ORM, so the row counters have to be told about the new rows
+    deltas = Counter({(table, ALL_OWNERS): len(records)})
+    if "owner_id" in table.c:
+        owner_index = columns.index("owner_id")
+        for record in records:
+            if record[owner_index] is not None:
+                deltas[(table, record[owner_index])] += 1
+    await session.run_sync(lambda sync_session: apply_count_deltas(sync_session.connection(), deltas))
+    # ...and so does the city graph
+    id_index = columns.index("id")
+    record_node_changes(session.sync_session, table, (record[id_index] for record in records))
+    record_table_writes(session.sync_session, table.name)
+
+
+async def import_rows(session: AsyncSession, entity: str, frame: "pd.DataFrame", owner_id: Optional[uuid.UUID],
+                      dry_run: bool = False) -> ImportReport:
+    # Validation is CPU bound - keep it off the event loop
+    records, columns, errors = await run_in_threadpool(validate_rows, frame, entity, owner_id)
+    if records and not dry_run:
+        await copy_records(session, entity, records, columns)
+        await session.commit()
+    return ImportReport(
+        entity=entity,
+        rows_total=len(frame),
+        rows_imported=0 if dry_run else len(records),
+        rows_failed=len(errors),
+        errors=errors,
+    )
@@ -0,0 +1,186 @@
+import uuid
+from collections import Counter
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Table, event, inspect, literal, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.models.models import EntityCount
+
+
+""" ROW COUNTS """
+# Every create/delete that goes through the ORM adjusts a per-table total and a per-owner counter in the same
+# transaction, so list endpoints read one row instead of scanning the table. Owner reassignments and rows removed
+# by ON DELETE CASCADE foreign keys are counted too.
+# NOTE: bulk statements that bypass the ORM (insert()/delete() on the table) must call apply_count_deltas themselves.
+
+ALL_OWNERS = uuid.UUID(int=0)
+counter_table: Table = EntityCount.__table__
+
+
+def _is_counted(table: Table) -> bool:
+    return "id" in table.c and table.name != counter_table.name
+
+
+def apply_count_deltas(connection: Any, deltas: Counter) -> None:
+    for (table, owner_id), delta in deltas.items():
+        if not delta:
+            continue
+        # The first write for a counter seeds it with an exact count (which already includes this flush), every
+        # later write just adds its delta - so counters are correct even for tables that existed before them
+        seed = select(func.count()).select_from(table)
+        if owner_id != ALL_OWNERS:
+            seed = seed.where(table.c.owner_id == owner_id)
+        statement = (
+            insert(counter_table)
+            .values(entity=table.name, owner_id=owner_id, row_count=seed.scalar_subquery())
+            .on_conflict_do_update(
+                index_elements=[counter_table.c.entity, counter_table.c.owner_id],
+                set_={"row_count": counter_table.c.row_count + delta},
+            )
+        )
+        connection.execute(statement)
+
+
+def count_deltas(instances: Any, sign: int, deltas: Optional[Counter] = None) -> Counter:
+    deltas = Counter() if deltas is None else deltas
+    for instance in instances:
+        table = getattr(instance, "__table__", None)
+        if table is None or not _is_counted(table):
+            continue
+        deltas[(table, ALL_OWNERS)] += sign
+        owner_id = getattr(instance, "owner_id", None)
+        if owner_id is not None:
+            deltas[(table, owner_id)] += sign
+    return deltas
+
+
+def _owner_change_deltas(instances: Any, deltas: Counter) -> Counter:
+    # A row moved to another owner leaves one per-owner counter and joins another - the total is unchanged
+    for instance in instances:
+        table = getattr(instance, "__table__", None)
+        if table is None or not _is_counted(table) or "owner_id" not in table.c:
+            continue
+        history = inspect(instance).attrs.owner_id.history
+        if not history.has_changes():
+            continue
+        for owner_id in history.deleted:
+            if owner_id is not None:
+                deltas[(table, owner_id)] -= 1
+        for owner_id in history.added:
+            if owner_id is not None:
+                deltas[(table, owner_id)] += 1
+    return deltas
+
+
+def _cascade_children() -> dict[str, list[tuple[Table, Any]]]:
+    """Parent table -> [(counted child table, foreign key column)] for foreign keys declared ON DELETE CASCADE."""
+    children: dict[str, list[tuple[Table, Any]]] = {}
+    for table in SQLModel.metadata.sorted_tables:
+        if not _is_counted(table):
+            continue
+        for foreign_key in table.foreign_keys:
+            if (foreign_key.ondelete or "").upper() == "CASCADE":
+                children.setdefault(foreign_key.column.table.name, []).append((table, foreign_key.parent))
+    return children
+
+
+CASCADE_CHILDREN = _cascade_children()
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _count_cascades(session: OrmSession, flush_context: Any, instances: Any) -> None:
+    # Rows Postgres deletes through ON DELETE CASCADE never pass through the session - they are counted here,
+    # while they still exist, and applied with the rest of the flush. Children the session deletes itself are
+    # left to _track_counts
+    deltas: Counter = Counter()
+    deleted = [instance for instance in session.deleted if getattr(instance, "__table__", None) is not None]
+    for instance in deleted:
+        for child, column in CASCADE_CHILDREN.get(instance.__table__.name, ()):
+            owned = "owner_id" in child.c
+            statement = select(child.c.owner_id, func.count()).group_by(child.c.owner_id) if owned \
+                else select(literal(None), func.count())
+            statement = statement.select_from(child).where(column == instance.id)
+            deleted_children = [other.id for other in deleted if other.__table__ is child]
+            if deleted_children:
+                statement = statement.where(child.c.id.not_in(deleted_children))
+            for owner_id, count in session.connection().execute(statement):
+                deltas[(child, ALL_OWNERS)] -= count
+                if owner_id is not None:
+                    deltas[(child, owner_id)] -= count
+    session.info["cascade_count_deltas"] = deltas
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_counts(session: OrmSession, flush_context: Any) -> None:
+    deltas = count_deltas(session.new, 1)
+    count_deltas(session.deleted, -1, deltas)
+    _owner_change_deltas(session.dirty, deltas)
+    deltas.update(session.info.pop("cascade_count_deltas", Counter()))
+    if deltas:
+        apply_count_deltas(session.connection(), deltas)
+
+
+async def _estimated_count(session: AsyncSession, table: Table) -> Optional[int]:
+    estimate = (await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table.name},
+    )).scalar()
+    # reltuples is -1 until the table has been vacuumed/analysed at least once
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def get_count(session: AsyncSession, model: Any, owner_id: Optional[uuid.UUID] = None,
+                    filters: Sequence[Any] = ()) -> tuple[int, bool]:
+    """Returns (count, exact) for a table, optionally restricted to one owner and/or extra filters."""
+    table = model.__table__
+
+    if filters:
+        # Counters only know whole-table and per-owner totals - anything narrower has to be counted
+        count_statement = select(func.count()).select_from(table).where(*filters)
+        if owner_id is not None:
+            count_statement = count_statement.where(table.c.owner_id == owner_id)
+        return (await session.exec(count_statement)).one(), True
+
+    if owner_id is None and settings.APPROXIMATE_COUNT_THRESHOLD > 0:
+        estimate = await _estimated_count(session, table)
+        if estimate is not None and estimate >= settings.APPROXIMATE_COUNT_THRESHOLD:
+            return estimate, False
+
+    counter = await session.get(EntityCount, (table.name, owner_id or ALL_OWNERS))
+    if counter is not None:
+        return counter.row_count, True
+
+    # No counter yet (nothing written since it was added) - fall back to an exact count
+    count_statement = select(func.count()).select_from(table)
+    if owner_id is not None:
+        count_statement = count_statement.where(table.c.owner_id == owner_id)
+    return (await session.exec(count_statement)).one(), True
+
+
+async def rebuild_counts(session: AsyncSession) -> None:
+    """Seeds any missing counters from the current table contents - counters that already exist are left alone."""
+    for table in SQLModel.metadata.sorted_tables:
+        if not _is_counted(table):
+            continue
+        selects = [select(literal(table.name), literal(ALL_OWNERS), func.count()).select_from(table)]
+        if "owner_id" in table.c:
+            selects.append(
+                select(literal(table.name), table.c.owner_id, func.count())
+                .where(table.c.owner_id.is_not(None))
+                .group_by(table.c.owner_id)
+            )
+        for seed in selects:
+            statement = (
+                insert(counter_table)
+                .from_select(["entity", "owner_id", "row_count"], seed)
+                .on_conflict_do_nothing()
+            )
+            await session.execute(statement)
+    await session.commit()
@@ -0,0 +1,58 @@
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.serialisation import encode_lines
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine
+from backend.app.crud.links import LINK_MODELS
+from backend.app.models.models import Artefact, ArtefactMedia, Cluster, Experience, ExperienceComponent, Feasibility, Hub, \
+    Narrative, Site, Substory, Tour
+
+
+""" NDJSON EXPORT """
+# Whole tables are streamed one JSON object per line. Rows come off a server-side cursor EXPORT_BATCH_SIZE at a
+# time and each batch is encoded and sent before the next is fetched, so memory stays flat whatever the table size.
+# The stream opens its own session - the request's session is closed before a StreamingResponse body is sent.
+
+EXPORTABLE: dict[str, Any] = {
+    "experiences": Experience,
+    "experience_components": ExperienceComponent,
+    "feasibility": Feasibility,
+    "narratives": Narrative,
+    "substories": Substory,
+    "sites": Site,
+    "clusters": Cluster,
+    "artefacts": Artefact,
+    "artefact_media": ArtefactMedia,
+    "hubs": Hub,
+    "tours": Tour,
+    **LINK_MODELS,
+}
+
+
+def get_exportable(entity: str, is_superuser: bool) -> Any:
+    if entity not in EXPORTABLE:
+        raise HTTPException(status_code=404, detail=f"Can't export {entity} - expected one of {', '.join(EXPORTABLE)}")
+    model = EXPORTABLE[entity]
+    # Tables without an owner (link tables included) are superuser only, as with single reads
+    if not is_superuser and "owner_id" not in model.__table__.c:
+        raise HTTPException(status_code=400, detail=f"No permission to export {entity}")
+    return model
+
+
+async def stream_rows(model: Any, owner_id: Optional[uuid.UUID] = None) -> AsyncIterator[bytes]:
+    table = model.__table__
+    names = [str(column.name) for column in table.columns]
+    statement = select(*table.columns).order_by(*table.primary_key.columns)
+    if owner_id is not None:
+        statement = statement.where(table.c.owner_id == owner_id)
+
+    async with AsyncSession(async_engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield encode_lines(names, rows)
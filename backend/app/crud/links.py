@@ -0,0 +1,143 @@
+import uuid
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Table, Uuid, bindparam, delete, func, literal, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.table_versions import record_table_writes
+from backend.app.models.models import ArtefactNarrativeLink, ClusterHubLink, ExperienceClusterLink, \
+    ExperienceHubLink, ExperienceNarrativeLink, ExperienceSiteLink, ExperienceTourLink, NarrativeTourLink, \
+    SiteHubLink, SiteNarrativeLink, SiteTourLink, Tour, User
+from backend.app.services.city_graph import record_edge_changes
+from backend.app.services.tour_routes import optimise_route
+
+
+""" LINK TABLES """
+# Set-based attach/detach/replace for the many:many link tables. Pairs are sent as two uuid[] parameters and
+# unnested server side, so linking 10k rows is one statement with two bind parameters rather than 10k ORM appends.
+# Same ownership rule as single reads: non-superusers may only link rows they own, so links with no owned side
+# (e.g. site-hub) are superuser only.
+
+LINK_MODELS: dict[str, Any] = {
+    "experience-site": ExperienceSiteLink,
+    "site-narrative": SiteNarrativeLink,
+    "artefact-narrative": ArtefactNarrativeLink,
+    "narrative-tour": NarrativeTourLink,
+    "site-tour": SiteTourLink,
+    "site-hub": SiteHubLink,
+    "cluster-hub": ClusterHubLink,
+    "experience-hub": ExperienceHubLink,
+    "experience-cluster": ExperienceClusterLink,
+    "experience-tour": ExperienceTourLink,
+    "experience-narrative": ExperienceNarrativeLink,
+}
+
+
+def get_link_table(link: str) -> Table:
+    if link not in LINK_MODELS:
+        raise HTTPException(status_code=404, detail=f"Unknown link {link}")
+    return LINK_MODELS[link].__table__
+
+
+def link_columns(table: Table) -> tuple[Any, Any]:
+    left, right = table.primary_key.columns
+    return left, right
+
+
+def _uuid_array(name: str, values: list[uuid.UUID]) -> Any:
+    return bindparam(name, value=values, type_=ARRAY(Uuid()))
+
+
+async def check_link_access(session: AsyncSession, current_user: User, link: str, lefts: list[uuid.UUID],
+                            rights: list[uuid.UUID]) -> None:
+    if current_user.is_superuser:
+        return
+    owned = []
+    for column, ids in zip(link_columns(get_link_table(link)), (lefts, rights)):
+        parent = next(iter(column.foreign_keys)).column.table
+        if "owner_id" in parent.c:
+            owned.append((parent, ids))
+    if not owned:
+        raise HTTPException(status_code=400, detail=f"No permission to change {link} links")
+    for parent, ids in owned:
+        not_owned = (await session.execute(
+            select(parent.c.id)
+            .where(parent.c.id.in_(select(func.unnest(_uuid_array("ids", list(ids))))))
+            .where(parent.c.owner_id.is_distinct_from(current_user.id))
+            .limit(1)
+        )).first()
+        if not_owned:
+            raise HTTPException(status_code=400, detail=f"No permission to access this {parent.name}")
+
+
+async def _execute(session: AsyncSession, table: Table, removed: Any = None, added: Any = None) -> int:
+    # Both statements RETURN the pairs they actually touched so the city graph gets exactly those changes
+    columns = link_columns(table)
+    try:
+        removed_pairs = list(await session.execute(removed.returning(*columns))) if removed is not None else []
+        added_pairs = list(await session.execute(added.returning(*columns))) if added is not None else []
+        record_edge_changes(session.sync_session, table, added=added_pairs, removed=removed_pairs)
+        record_table_writes(session.sync_session, table.name)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="One or more ids don't exist")
+    if table is SiteTourLink.__table__:
+        # A tour's route, length and time follow its site set - re-optimised as soon as the set changes
+        for tour_id in dict.fromkeys(pair.tour_id for pair in [*removed_pairs, *added_pairs]):
+            tour = await session.get(Tour, tour_id)
+            if tour is not None:
+                await optimise_route(session, tour)
+    return len(removed_pairs) + len(added_pairs)
+
+
+async def attach_links(session: AsyncSession, current_user: User, link: str,
+                       pairs: list[tuple[uuid.UUID, uuid.UUID]]) -> int:
+    table = get_link_table(link)
+    await check_link_access(session, current_user, link, [pair[0] for pair in pairs], [pair[1] for pair in pairs])
+    left, right = link_columns(table)
+    pairs = list(dict.fromkeys(pairs))
+    source = select(
+        func.unnest(_uuid_array("lefts", [pair[0] for pair in pairs])),
+        func.unnest(_uuid_array("rights", [pair[1] for pair in pairs])),
+    )
+    statement = insert(table).from_select([left.name, right.name], source).on_conflict_do_nothing()
+    return await _execute(session, table, added=statement)
+
+
+async def detach_links(session: AsyncSession, current_user: User, link: str,
+                       pairs: list[tuple[uuid.UUID, uuid.UUID]]) -> int:
+    table = get_link_table(link)
+    await check_link_access(session, current_user, link, [pair[0] for pair in pairs], [pair[1] for pair in pairs])
+    left, right = link_columns(table)
+    source = select(
+        func.unnest(_uuid_array("lefts", [pair[0] for pair in pairs])),
+        func.unnest(_uuid_array("rights", [pair[1] for pair in pairs])),
+    )
+    statement = delete(table).where(tuple_(left, right).in_(source))
+    return await _execute(session, table, removed=statement)
+
+
+async def replace_links(session: AsyncSession, current_user: User, link: str, left_id: uuid.UUID,
+                        right_ids: list[uuid.UUID]) -> int:
+    """Makes right_ids the complete set linked to left_id - one DELETE for the leftovers, one INSERT for the rest."""
+    table = get_link_table(link)
+    left, right = link_columns(table)
+    # The rows being unlinked are checked too - they are whatever is linked to left_id now
+    current = list((await session.execute(select(right).where(left == left_id))).scalars())
+    await check_link_access(session, current_user, link, [left_id], list(dict.fromkeys([*right_ids, *current])))
+    right_ids = list(dict.fromkeys(right_ids))
+    removed = delete(table).where(left == left_id, right.not_in(select(func.unnest(_uuid_array("keep", right_ids)))))
+    added = (
+        insert(table)
+        .from_select(
+            [left.name, right.name],
+            select(literal(left_id, Uuid()), func.unnest(_uuid_array("rights", right_ids))),
+        )
+        .on_conflict_do_nothing()
+    )
+    return await _execute(session, table, removed=removed, added=added)
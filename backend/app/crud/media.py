@@ -0,0 +1,123 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+from typing import Any, BinaryIO, Iterable
+
+from fastapi import HTTPException, Response, UploadFile
+from fastapi.responses import FileResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.config import settings
+from backend.app.models.models import Artefact, ArtefactMedia, User
+
+
+""" ARTEFACT MEDIA """
+# Uploads are copied MEDIA_CHUNK_SIZE bytes at a time into a temporary file while being hashed, then moved to
+# MEDIA_ROOT/ab/cd/<sha256>. A file that is already stored is never written twice - the upload is dropped and the
+# new ArtefactMedia row points at the existing copy. Files are removed once no row references their hash.
+# Downloads never pass through Python memory: FileResponse reads the file in chunks and answers Range requests,
+# and with MEDIA_ACCEL_REDIRECT set the proxy sends the file itself (sendfile).
+
+def blob_path(sha256: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / sha256[:2] / sha256[2:4] / sha256
+
+
+def store_blob(source: BinaryIO) -> tuple[str, int]:
+    """Blocking - run in the threadpool. Returns (sha256, size)."""
+    incoming = Path(settings.MEDIA_ROOT) / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    temporary = incoming / uuid.uuid4().hex
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(temporary, "wb") as target:
+            while chunk := source.read(settings.MEDIA_CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if path.exists():
+            temporary.unlink()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Same filesystem, so the move is atomic - readers never see a half written file
+            os.replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    return sha256, size
+
+
+async def get_media_artefact(session: AsyncSession, current_user: User, artefact_id: uuid.UUID) -> Artefact:
+    artefact = await session.get(Artefact, artefact_id)
+    if not artefact:
+        raise HTTPException(status_code=404, detail="Artefact not found")
+    # Same rule as the artefact itself - rows without an owner are superuser only
+    if not current_user.is_superuser and getattr(artefact, "owner_id", None) != current_user.id:
+        raise HTTPException(status_code=400, detail="No permission to access this artefact")
+    return artefact
+
+
+async def get_media(session: AsyncSession, artefact_id: uuid.UUID, media_id: uuid.UUID) -> ArtefactMedia:
+    media = await session.get(ArtefactMedia, media_id)
+    if not media or media.artefact_id != artefact_id:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return media
+
+
+async def list_media(session: AsyncSession, artefact_id: uuid.UUID) -> list[ArtefactMedia]:
+    statement = select(ArtefactMedia).where(ArtefactMedia.artefact_id == artefact_id).order_by(ArtefactMedia.created_at)
+    return list((await session.exec(statement)).all())
+
+
+async def attach_media(session: AsyncSession, artefact: Artefact, file: UploadFile) -> ArtefactMedia:
+    sha256, size = await run_in_threadpool(store_blob, file.file)
+    media = ArtefactMedia(
+        artefact_id=artefact.id,
+        filename=os.path.basename(file.filename or sha256),
+        content_type=file.content_type,
+        sha256=sha256,
+        size=size,
+    )
+    session.add(media)
+    await session.commit()
+    await session.refresh(media)
+    return media
+
+
+async def remove_unreferenced(session: AsyncSession, hashes: Iterable[str]) -> None:
+    # NOTE: an upload of the same file racing with this check can lose its blob - it is re-created by uploading again
+    hashes = set(hashes)
+    if not hashes:
+        return
+    referenced = set((await session.exec(select(ArtefactMedia.sha256).where(ArtefactMedia.sha256.in_(hashes)))).all())
+    for sha256 in hashes - referenced:
+        blob_path(sha256).unlink(missing_ok=True)
+
+
+async def delete_media(session: AsyncSession, media: ArtefactMedia) -> None:
+    await session.delete(media)
+    await session.commit()
+    await remove_unreferenced(session, [media.sha256])
+
+
+def media_response(media: ArtefactMedia) -> Any:
+    path = blob_path(media.sha256)
+    # Stored files never change, so the hash is a strong validator and clients can keep them
+    headers = {"ETag": f'"{media.sha256}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    if settings.MEDIA_ACCEL_REDIRECT:
+        relative = path.relative_to(settings.MEDIA_ROOT).as_posix()
+        response = Response(media_type=media.content_type, headers=headers)
+        response.headers["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT.rstrip('/')}/{relative}"
+        response.headers["Content-Disposition"] = f"inline; filename*=utf-8''{quote(media.filename)}"
+        return response
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Media file missing from storage")
+    # inline so audio and video can play in place - players fetch them with Range requests
+    return FileResponse(
+        path, media_type=media.content_type, filename=media.filename, headers=headers, content_disposition_type="inline"
+    )
@@ -0,0 +1,43 @@
+import base64
+import uuid
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+""" KEYSET PAGINATION """
+# Pages are ordered on the primary key and continue from the last id seen, so page 500 costs the same
+# index range scan as page 1 - no OFFSET walking over rows that are thrown away.
+
+def encode_cursor(last_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(last_id.bytes).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+async def paginate(session: AsyncSession, model: Any, *filters: Any, limit: int, cursor: Optional[str] = None,
+                   columns: Sequence[Any] = ()) -> tuple[list[Any], Optional[str]]:
+    """Returns model instances, or rows of just `columns` (which must include model.id) when they're given."""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be at least 1")
+
+    statement = (select(*columns) if columns else select(model)).where(*filters)
+    if cursor:
+        statement = statement.where(model.id > decode_cursor(cursor))
+    # Fetch one extra row to find out whether there is another page without a second query
+    statement = statement.order_by(model.id).limit(limit + 1)
+    rows = list((await session.exec(statement)).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
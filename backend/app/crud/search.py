@@ -0,0 +1,78 @@
+from typing import Any
+
+from sqlalchemy import Column, Computed, Index, Table, func, literal, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+""" FULL TEXT SEARCH """
+# Narratives, substories and artefacts carry a search_vector column that Postgres generates from their text
+# columns (weighted A = name, B = themes etc., C = description) and a GIN index over it, so a search never has to
+# re-parse the documents. Ranking and highlighting only run on the best rows of each table.
+
+SEARCH_CONFIG = "english"
+
+# type -> (table, name column, body column used for highlighting)
+SEARCHABLE: dict[str, tuple[str, str, str]] = {
+    "narrative": ("narrative", "narrative_name", "narrative_description"),
+    "substory": ("substory", "substory_name", "substory_description"),
+    "artefact": ("artefact", "artefact_name", "artefact_description"),
+}
+
+
+def search_vector_column(weighted_columns: list[tuple[str, str]]) -> Column:
+    expression = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+    return Column("search_vector", TSVECTOR, Computed(expression, persisted=True))
+
+
+def search_vector_index(prefix: str) -> Index:
+    return Index(f"ix_{prefix}_search_vector", "search_vector", postgresql_using="gin")
+
+
+def _escape_html(text: Any) -> Any:
+    # & first, so the entities added for < and > aren't escaped again
+    for character, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#39;")):
+        text = func.replace(text, character, entity)
+    return text
+
+
+async def search(session: AsyncSession, q: str, types: list[str], limit: int) -> list[Any]:
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+    parts = []
+    for search_type in types:
+        table_name, name_column, body_column = SEARCHABLE[search_type]
+        table: Table = SQLModel.metadata.tables[table_name]
+        rank = func.ts_rank(table.c.search_vector, query)
+        parts.append(
+            select(
+                literal(search_type).label("type"),
+                table.c.id.label("id"),
+                table.c[name_column].label("name"),
+                table.c[body_column].label("body"),
+                rank.label("rank"),
+            )
+            .where(table.c.search_vector.op("@@")(query))
+            .order_by(rank.desc())
+            .limit(limit)
+            .subquery()
+            .select()
+        )
+
+    hits = union_all(*parts).subquery()
+    best = select(hits).order_by(hits.c.rank.desc()).limit(limit).subquery()
+    # ts_headline re-parses the document, so it only runs on the rows that are actually returned. The highlight
+    # is HTML (matches wrapped in <mark>), so the user-entered text is escaped first - only the marks are markup
+    highlight = func.ts_headline(
+        SEARCH_CONFIG, _escape_html(func.coalesce(best.c.body, "")), query,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=2",
+    )
+    statement = (
+        select(best.c.type, best.c.id, best.c.name, best.c.rank, highlight.label("highlight"))
+        .order_by(best.c.rank.desc())
+    )
+    return list((await session.execute(statement)).all())
@@ -0,0 +1,49 @@
+import math
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Index, func, text
+
+
+""" BOUNDING BOXES """
+# Sites, hubs and clusters store their extent as four floats. A GiST index over box(point(east, north),
+# point(west, south)) lets a viewport query use && (overlaps) instead of comparing four columns on every row.
+# The query expression below has to stay identical to the indexed one, or the planner won't use the index.
+
+def boundary_box_index(prefix: str) -> Index:
+    return Index(
+        f"ix_{prefix}_boundary_box",
+        text(f"box(point({prefix}_boundary_east, {prefix}_boundary_north), "
+             f"point({prefix}_boundary_west, {prefix}_boundary_south))"),
+        postgresql_using="gist",
+    )
+
+
+def boundary_box(model: Any, prefix: str) -> Any:
+    return func.box(
+        func.point(getattr(model, f"{prefix}_boundary_east"), getattr(model, f"{prefix}_boundary_north")),
+        func.point(getattr(model, f"{prefix}_boundary_west"), getattr(model, f"{prefix}_boundary_south")),
+    )
+
+
+def parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Parses "west,south,east,north" (the usual map viewport order)."""
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+    # float() also accepts nan and inf - a nan box compares false with everything, so it would pass the order
+    # check below and quietly match nothing
+    if not all(math.isfinite(value) for value in (west, south, east, north)):
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        raise HTTPException(status_code=400, detail="bbox longitudes must be within ±180 and latitudes within ±90")
+    if west > east or south > north:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north with west <= east and south <= north")
+    return west, south, east, north
+
+
+def bbox_filter(model: Any, prefix: str, bbox: str) -> Any:
+    west, south, east, north = parse_bbox(bbox)
+    viewport = func.box(func.point(east, north), func.point(west, south))
+    return boundary_box(model, prefix).op("&&")(viewport)
@@ -1,38 +1,22 @@
+import asyncio
 import logging
 
-from sqlalchemy import Engine
-from sqlmodel import Session, select
-from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
-
-from backend.app.core.db import engine
+from backend.app.core.db import async_engine, wait_for_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-max_tries = 100
-wait_seconds = 1
-
 
-@retry(
-    stop=stop_after_attempt(max_tries),
-    wait=wait_fixed(wait_seconds),
-    before=before_log(logger, logging.INFO),
-    after=after_log(logger, logging.WARN),
-)
-def init(db_engine: Engine) -> None:
-    try:
-        with Session(db_engine) as session:
-            session.exec(select(1))
-    except Exception as e:
-        logger.error(e)
-        raise e
+async def init() -> None:
+    await wait_for_db()
+    await async_engine.dispose()
 
 
 def main() -> None:
-    logger.info("Initialising the db...")
-    init(engine)
-    logger.info("The db has been initialised!")
+    logger.info("Waiting for the db...")
+    asyncio.run(init())
+    logger.info("The db is up!")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
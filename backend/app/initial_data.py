@@ -1,7 +1,8 @@
+import asyncio
 import logging
 
-from sqlmodel import Session
-from backend.app.core.db import engine, init_db
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.app.core.db import async_engine, init_db
 
 
 logging.basicConfig(
@@ -15,16 +16,15 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-logger.info("This is an info message.")
-
-def init() -> None:
-    with Session(engine) as session:
-        init_db(session)
+async def init() -> None:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await init_db(session)
+    await async_engine.dispose()
 
 
 def main() -> None:
     logger.info("Creating initial data")
-    init()
+    asyncio.run(init())
     logger.info("Initial data created")
 
 
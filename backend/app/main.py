@@ -1,10 +1,65 @@
+import time
+
+# Taken before the imports below - they are a good part of the cold start
+STARTED_AT = time.perf_counter()
+
+import asyncio
+import gc
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from backend.app.api.main import api_router
 from backend.app.core.config import settings
+from backend.app.core.db import async_engine, wait_for_db, warm_up
+from backend.app.core.metrics import MetricsMiddleware
+from backend.app.core.query_stats import QueryStatsMiddleware
+from backend.app.core.security import password_hasher
+from backend.app.services.city_graph import city_graph
 from starlette.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+# uvicorn's own logger - the app doesn't configure logging, so it's the one that reaches the console
+logger = logging.getLogger("uvicorn.error")
+
+
+async def preload_graph() -> None:
+    try:
+        async with AsyncSession(async_engine) as session:
+            await city_graph.ensure_loaded(session)
+        # Moves everything alive now - the graph, mappers, modules - out of the collector's reach, so full
+        # collections don't walk a million graph objects. Once only - frozen objects are never collected, so a
+        # freeze after every rebuild would leave each replaced graph's reference cycles behind
+        gc.freeze()
+    except Exception:
+        # The first graph request tries again
+        logger.exception("City graph preload failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The pool and mappers are warmed before uvicorn starts accepting connections
+    app.state.ready = False
+    await wait_for_db()
+    await warm_up()
+    # Not waited for - a login before the hashing workers are up starts one itself, and graph requests made while
+    # the graph is still loading wait for it (the load takes seconds on a big database)
+    background = [asyncio.create_task(password_hasher.warm_up())]
+    if settings.GRAPH_PRELOAD:
+        background.append(asyncio.create_task(preload_graph()))
+    app.state.ready = True
+    logger.info(f"Ready in {time.perf_counter() - STARTED_AT:.2f}s")
+    yield
+    app.state.ready = False
+    for task in background:
+        task.cancel()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -12,4 +67,6 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router)
\ No newline at end of file
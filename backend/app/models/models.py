@@ -2,9 +2,32 @@ import datetime
 import uuid
 
 from pydantic import EmailStr
+from sqlalchemy import BigInteger, DateTime, Index, event, func, text
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 
+from backend.app.crud.spatial import boundary_box_index
+from backend.app.crud.search import search_vector_column, search_vector_index
+
+
+# Entity tables carry a row version and last-modified time for ETags and the response cache. Both are set in the
+# UPDATE statement itself (so concurrent writers can't hand out the same version) and read back in the same flush.
+class VersionedModel(SQLModel):
+    __mapper_args__ = {"eager_defaults": True}
+
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+    updated_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+    )
+
+
+@event.listens_for(VersionedModel, "before_update", propagate=True)
+def _bump_version(mapper, connection, target) -> None:
+    target.version = mapper.local_table.c.version + 1
+    target.updated_at = func.now()
+
 
 # The generic parent User class - prevents dupes, other models will inherit from this
 class UserBase(SQLModel):
@@ -38,6 +61,8 @@ class UserPublic(UserBase):
 class UsersPublic(SQLModel):
     users: list[UserPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 """
@@ -58,60 +83,162 @@ class TokenPayload(SQLModel):
     sub: str | None = None
 
 
+class DBPoolStats(SQLModel):
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    connections_opened: int
+    connections_closed: int
+    connections_invalidated: int
+    connection_churn_per_minute: float
+    wait_avg_ms: float
+    wait_max_ms: float
+    postgres_max_connections: int
+    postgres_connections: int
+
+
+class GraphNode(SQLModel):
+    kind: str
+    id: uuid.UUID
+    distance: Optional[int] = None
+
+
+class GraphNodes(SQLModel):
+    nodes: list[GraphNode]
+    count: int
+
+
+class GraphPath(SQLModel):
+    nodes: list[GraphNode]
+    length: int
+
+
+class GraphStats(SQLModel):
+    loaded: bool
+    version: int
+    nodes: int
+    edges: int
+
+
+class SearchHit(SQLModel):
+    type: str
+    id: uuid.UUID
+    name: str
+    rank: float
+    highlight: Optional[str] = None # HTML - escaped description text with <mark> around the matches
+
+
+class SearchResults(SQLModel):
+    hits: list[SearchHit]
+    count: int
+
+
+class ImportRowError(SQLModel):
+    row: int
+    errors: list[str]
+
+
+class ImportReport(SQLModel):
+    entity: str
+    rows_total: int
+    rows_imported: int
+    rows_failed: int
+    errors: list[ImportRowError]
+
+
+class PasswordHashStats(SQLModel):
+    workers: int
+    max_queue: int
+    in_flight: int
+    queue_depth: int
+    rejected: int
+
+
+''' Row counters - kept up to date on create/delete so list endpoints don't need a COUNT(*) per call '''
+class EntityCount(SQLModel, table=True):
+    entity: str = Field(primary_key=True, max_length=255)
+    owner_id: uuid.UUID = Field(primary_key=True) # nil UUID holds the total across all owners
+    row_count: int = Field(default=0)
+
+
 ''' Link Models for Many:Many '''
+# The composite primary key serves lookups by its first column - the second is indexed for the other direction
 class ExperienceSiteLink(SQLModel, table=True):
     experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key='experience.id', primary_key=True)
-    site_id: Optional[uuid.UUID] = Field(default=None, foreign_key='site.id', primary_key=True)
+    site_id: Optional[uuid.UUID] = Field(default=None, foreign_key='site.id', primary_key=True, index=True)
 
 
 class SiteNarrativeLink(SQLModel, table=True):
     site_id: Optional[uuid.UUID] = Field(default=None, foreign_key='site.id', primary_key=True)
-    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True)
+    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True, index=True)
 
 
 class ArtefactNarrativeLink(SQLModel, table=True):
     artefact_id: Optional[uuid.UUID] = Field(default=None, foreign_key='artefact.id', primary_key=True)
-    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True)
+    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True, index=True)
 
 
 class NarrativeTourLink(SQLModel, table=True):
     narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True)
-    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True)
+    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True, index=True)
 
 
 class SiteTourLink(SQLModel, table=True):
     site_id: Optional[uuid.UUID] = Field(default=None, foreign_key='site.id', primary_key=True)
-    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True)
+    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True, index=True)
+    # Position of the site on the tour's optimised route - filled in by the route engine
+    visit_order: Optional[int] = Field(default=None)
 
 
 class SiteHubLink(SQLModel, table=True):
     site_id: Optional[uuid.UUID] = Field(default=None, foreign_key='site.id', primary_key=True)
-    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True)
+    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True, index=True)
 
 
 class ClusterHubLink(SQLModel, table=True):
     cluster_id: Optional[uuid.UUID] = Field(default=None, foreign_key='cluster.id', primary_key=True)
-    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True)
+    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True, index=True)
 
 
 class ExperienceHubLink(SQLModel, table=True):
     experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key='experience.id', primary_key=True)
-    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True)
+    hub_id: Optional[uuid.UUID] = Field(default=None, foreign_key='hub.id', primary_key=True, index=True)
 
 
 class ExperienceClusterLink(SQLModel, table=True):
     experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key='experience.id', primary_key=True)
-    cluster_id: Optional[uuid.UUID] = Field(default=None, foreign_key='cluster.id', primary_key=True)
+    cluster_id: Optional[uuid.UUID] = Field(default=None, foreign_key='cluster.id', primary_key=True, index=True)
 
 
 class ExperienceTourLink(SQLModel, table=True):
     experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key='experience.id', primary_key=True)
-    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True)
+    tour_id: Optional[uuid.UUID] = Field(default=None, foreign_key='tour.id', primary_key=True, index=True)
 
 
 class ExperienceNarrativeLink(SQLModel, table=True):
     experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key='experience.id', primary_key=True)
-    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True)
+    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key='narrative.id', primary_key=True, index=True)
+
+
+class LinkPairs(SQLModel):
+    pairs: list[tuple[uuid.UUID, uuid.UUID]] # (left id, right id) in the order the link's columns are listed
+
+
+class LinkTargets(SQLModel):
+    ids: list[uuid.UUID]
+
+
+class LinkResult(SQLModel):
+    link: str
+    affected: int
+
+
+class LinkInfo(SQLModel):
+    link: str
+    columns: list[str]
 
 
 ''' Experiences - will need to consider update class later '''
@@ -130,7 +257,10 @@ class ExperienceBase(SQLModel):
     experience_blueprint_id: Optional[str] = Field(default=None, max_length=50)
 
 
-class Experience(ExperienceBase, table=True):
+class Experience(ExperienceBase, VersionedModel, table=True):
+    # Owner filtered list pages - WHERE owner_id = ? ORDER BY id LIMIT ? reads straight off this index
+    __table_args__ = (Index("ix_experience_owner_id_id", "owner_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id") # TODO: composite PK with user id?
 
@@ -139,7 +269,7 @@ class Experience(ExperienceBase, table=True):
     experience_components: List["ExperienceComponent"] = Relationship(back_populates="experience")
 
     # 1:1 - Experience:ExperienceFeasibility
-    experience_feasibility: Optional["Feasibility"] = Relationship(back_populates="experience", uselist=False)
+    experience_feasibility: Optional["Feasibility"] = Relationship(back_populates="experience", sa_relationship_kwargs={"uselist": False})
 
     # Many:Many
     sites: List["Site"] = Relationship(back_populates="experiences", link_model=ExperienceSiteLink)
@@ -156,6 +286,8 @@ class ExperiencePublic(ExperienceBase):
 class ExperiencesPublic(SQLModel):
     experiences: list[ExperiencePublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class ExperienceCreate(ExperienceBase):
@@ -178,13 +310,15 @@ class ExperienceComponentBase(SQLModel):
     experience_component_documentation: Optional[str] = Field(default=None, max_length=2000)
 
 
-class ExperienceComponent(ExperienceComponentBase, table=True):
+class ExperienceComponent(ExperienceComponentBase, VersionedModel, table=True):
+    __table_args__ = (Index("ix_experiencecomponent_owner_id_id", "owner_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
     ''' Relationships '''
     # 1:Many - Experience:ExperienceComponent
-    experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key="experience.id")
+    experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key="experience.id", index=True)
     experience: Optional["Experience"] = Relationship(back_populates="experience_components")
 
 class ExperienceComponentPublic(ExperienceComponentBase):
@@ -194,6 +328,8 @@ class ExperienceComponentPublic(ExperienceComponentBase):
 class ExperienceComponentsPublic(SQLModel):
     experience_components: list[ExperienceComponentPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class ExperienceComponentCreate(ExperienceComponentBase):
@@ -217,8 +353,18 @@ class NarrativeBase(SQLModel):
     narrative_card_id: Optional[str] = Field(default=None, max_length=50)
 
 
-class Narrative(NarrativeBase, table=True):
+class Narrative(NarrativeBase, VersionedModel, table=True):
+    __table_args__ = (search_vector_index("narrative"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Maintained by Postgres from the weighted text columns - read only
+    search_vector: Optional[str] = Field(default=None, sa_column=search_vector_column([
+        ("narrative_name", "A"),
+        ("theme", "B"),
+        ("sub_theme", "B"),
+        ("narrative_main_characters", "B"),
+        ("narrative_description", "C"),
+    ]))
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
     ''' Relationships '''
@@ -239,6 +385,8 @@ class NarrativePublic(NarrativeBase):
 class NarrativesPublic(SQLModel):
     narratives: list[NarrativePublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class NarrativeCreate(NarrativeBase):
@@ -259,13 +407,22 @@ class SubstoryBase(SQLModel):
     substory_card_id: Optional[str] = Field(default=None, max_length=50)
 
 
-class Substory(SubstoryBase, table=True):
+class Substory(SubstoryBase, VersionedModel, table=True):
+    __table_args__ = (search_vector_index("substory"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Maintained by Postgres from the weighted text columns - read only
+    search_vector: Optional[str] = Field(default=None, sa_column=search_vector_column([
+        ("substory_name", "A"),
+        ("substory_theme", "B"),
+        ("substory_locations", "B"),
+        ("substory_description", "C"),
+    ]))
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
     ''' Relationships '''
     # 1:Many - Narrative:Substory
-    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key="narrative.id")
+    narrative_id: Optional[uuid.UUID] = Field(default=None, foreign_key="narrative.id", index=True)
     narrative: Optional["Narrative"] = Relationship(back_populates="substories")
 
 
@@ -276,6 +433,8 @@ class SubstoryPublic(SubstoryBase):
 class SubstoriesPublic(SQLModel):
     substories: list[SubstoryPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class SubstoryCreate(SubstoryBase):
@@ -300,7 +459,9 @@ class SiteBase(SQLModel):
     site_status: Optional[str] = Field(default="draft", max_length=50)
 
 
-class Site(SiteBase, table=True):
+class Site(SiteBase, VersionedModel, table=True):
+    __table_args__ = (boundary_box_index("site"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
@@ -321,6 +482,8 @@ class SitePublic(SiteBase):
 class SitesPublic(SQLModel):
     sites: list[SitePublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class SiteCreate(SiteBase):
@@ -343,7 +506,9 @@ class ClusterBase(SQLModel):
     cluster_status: Optional[str] = Field(default="draft", max_length=50)
 
 
-class Cluster(ClusterBase, table=True):
+class Cluster(ClusterBase, VersionedModel, table=True):
+    __table_args__ = (boundary_box_index("cluster"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
@@ -360,6 +525,8 @@ class ClusterPublic(ClusterBase):
 class ClustersPublic(SQLModel):
     clusters: list[ClusterPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class ClusterCreate(ClusterBase):
@@ -379,13 +546,22 @@ class ArtefactBase(SQLModel):
     artefact_card_id: Optional[str] = Field(default=None, max_length=50)
 
 
-class Artefact(ArtefactBase, table=True):
+class Artefact(ArtefactBase, VersionedModel, table=True):
+    __table_args__ = (search_vector_index("artefact"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Maintained by Postgres from the weighted text columns - read only
+    search_vector: Optional[str] = Field(default=None, sa_column=search_vector_column([
+        ("artefact_name", "A"),
+        ("artefact_theme", "B"),
+        ("artefact_format", "B"),
+        ("artefact_description", "C"),
+    ]))
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
     ''' Relationships '''
     # 1:Many - Site:Artefact
-    site_id: Optional[uuid.UUID] = Field(default=None, foreign_key="site.id")
+    site_id: Optional[uuid.UUID] = Field(default=None, foreign_key="site.id", index=True)
     sites: Optional["Site"] = Relationship(back_populates="artefacts")
 
     # Many:Many
@@ -398,6 +574,8 @@ class ArtefactPublic(ArtefactBase):
 class ArtefactsPublic(SQLModel):
     artefacts: list[ArtefactPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class ArtefactCreate(ArtefactBase):
@@ -407,6 +585,33 @@ class ArtefactCreate(ArtefactBase):
     site_id: uuid.UUID
 
 
+# Media files attached to an artefact. The bytes live in content-addressed storage under MEDIA_ROOT, named by
+# their sha256 - attaching the same file twice (to any artefacts) stores it once.
+class ArtefactMediaBase(SQLModel):
+    filename: str = Field(max_length=255)
+    content_type: Optional[str] = Field(default=None, max_length=255)
+
+
+class ArtefactMedia(ArtefactMediaBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    artefact_id: uuid.UUID = Field(foreign_key="artefact.id", index=True, ondelete="CASCADE")
+    sha256: str = Field(max_length=64, index=True)
+    size: int = Field(sa_type=BigInteger)
+    created_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+    )
+
+
+class ArtefactMediaPublic(ArtefactMediaBase):
+    id: uuid.UUID
+    artefact_id: uuid.UUID
+    sha256: str
+    size: int
+    created_at: datetime.datetime
+
+
 ''' Hubs - will need to consider update class later '''
 class HubBase(SQLModel):
     hub_name: str = Field(max_length=255)
@@ -420,14 +625,16 @@ class HubBase(SQLModel):
     hub_tags: Optional[str] = Field(default=None, max_length=500)
 
 
-class Hub(HubBase, table=True):
+class Hub(HubBase, VersionedModel, table=True):
+    __table_args__ = (boundary_box_index("hub"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
     ''' Relationships '''
     sites: List["Site"] = Relationship(back_populates="hubs", link_model=SiteHubLink)
-    experiences: List["Site"] = Relationship(back_populates="hubs", link_model=ExperienceHubLink)
-    clusters: List["Site"] = Relationship(back_populates="hubs", link_model=ClusterHubLink)
+    experiences: List["Experience"] = Relationship(back_populates="hubs", link_model=ExperienceHubLink)
+    clusters: List["Cluster"] = Relationship(back_populates="hubs", link_model=ClusterHubLink)
 
 
 class HubPublic(HubBase):
@@ -437,6 +644,8 @@ class HubPublic(HubBase):
 class HubsPublic(SQLModel):
     hubs: list[HubPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class HubCreate(HubBase):
@@ -456,7 +665,7 @@ class TourBase(SQLModel):
     tour_status: Optional[str] = Field(default="draft", max_length=50)
 
 
-class Tour(TourBase, table=True):
+class Tour(TourBase, VersionedModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     #owner_id: Optional[uuid.UUID] = Field(foreign_key="user.id")
 
@@ -474,6 +683,25 @@ class TourPublic(TourBase):
 class ToursPublic(SQLModel):
     tours: list[TourPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
+
+
+class TourStop(SQLModel):
+    site_id: uuid.UUID
+    site_name: str
+    visit_order: Optional[int] = None
+    # Distance in km from the previous stop - None for the first stop and sites without a boundary
+    leg_length: Optional[float] = None
+
+
+class TourRoute(SQLModel):
+    tour_id: uuid.UUID
+    stops: list[TourStop]
+    tour_length: Optional[float] = None
+    tour_time: Optional[float] = None
+    # False when sites were linked after the last optimisation and have no place on the route yet
+    optimised: bool
 
 
 class TourCreate(TourBase):
@@ -493,12 +721,12 @@ class FeasibilityBase(SQLModel):
     feasible: Optional[bool] = Field(default=None)
 
 
-class Feasibility(FeasibilityBase, table=True):
+class Feasibility(FeasibilityBase, VersionedModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
     ''' Relationships '''
     # 1:1 - Experience:ExperienceFeasibility
-    experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key="experience_id")
+    experience_id: Optional[uuid.UUID] = Field(default=None, foreign_key="experience.id", index=True)
     experience: Optional["Experience"] = Relationship(back_populates="experience_feasibility")
 
 
@@ -509,7 +737,49 @@ class FeasibilityPublic(FeasibilityBase):
 class FeasibilitiesPublic(SQLModel):
     feasibilities: list[FeasibilityPublic]
     count: int
+    count_exact: bool = True
+    next_cursor: str | None = None
 
 
 class FeasibilityCreate(FeasibilityBase):
-    experience_id: uuid.UUID
\ No newline at end of file
+    experience_id: uuid.UUID
+
+
+class PortfolioBands(SQLModel):
+    p10: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+
+
+class PortfolioGroup(SQLModel):
+    key: Optional[str] = None
+    name: Optional[str] = None
+    experiences: int
+    assessed: int
+    feasible: int
+    investment: float
+    weighted_irr: Optional[float] = None
+    weighted_roi: Optional[float] = None
+
+
+class PortfolioStats(SQLModel):
+    totals: PortfolioGroup
+    investment_bands: PortfolioBands
+    irr_bands: PortfolioBands
+    roi_bands: PortfolioBands
+    by_stage: list[PortfolioGroup]
+    by_status: list[PortfolioGroup]
+    # An experience linked to several hubs/clusters counts towards each of them
+    by_hub: list[PortfolioGroup]
+    by_cluster: list[PortfolioGroup]
+
+
+''' Narrative subtree - everything a narrative links to, returned in one response '''
+class NarrativeGraph(NarrativePublic):
+    substories: list[SubstoryPublic] = []
+    artefacts: list[ArtefactPublic] = []
+    sites: list[SitePublic] = []
+    tours: list[TourPublic] = []
+    experiences: list[ExperiencePublic] = []
@@ -0,0 +1,262 @@
+import asyncio
+import gc
+import logging
+import uuid
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+
+import networkx as nx
+from sqlalchemy import Table, event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.models import models  # noqa: F401 - the graph is derived from the registered tables
+
+logger = logging.getLogger(__name__)
+
+
+""" CITY GRAPH """
+# One undirected graph of every entity (node = (table name, id)) and every relationship between them - the
+# many:many link tables plus the 1:many foreign keys. It is loaded once at startup and then kept current from
+# committed ORM changes and from the bulk link/import paths, so neighbourhood and path questions are answered
+# from memory instead of a chain of joins.
+# NOTE: the graph is per process - writes made by another worker only show up here after a rebuild.
+
+NODE_TABLES = (
+    "experience", "experiencecomponent", "feasibility", "narrative", "substory",
+    "site", "cluster", "artefact", "hub", "tour",
+)
+
+Node = tuple[str, uuid.UUID]
+# Rows per round trip while loading
+LOAD_BATCH_SIZE = 5000
+
+
+def _link_tables() -> dict[str, tuple[tuple[str, str], tuple[str, str]]]:
+    """Link table -> ((column, node table), (column, node table)) for tables whose key is two foreign keys."""
+    links = {}
+    for table in SQLModel.metadata.sorted_tables:
+        key_columns = list(table.primary_key.columns)
+        if len(key_columns) == 2 and all(column.foreign_keys for column in key_columns):
+            left, right = ((column.name, next(iter(column.foreign_keys)).column.table.name) for column in key_columns)
+            links[table.name] = (left, right)
+    return links
+
+
+def _foreign_key_edges() -> dict[str, list[tuple[str, str]]]:
+    """Node table -> [(column, node table it points at)] for the 1:many relationships."""
+    edges: dict[str, list[tuple[str, str]]] = {}
+    for table_name in NODE_TABLES:
+        table = SQLModel.metadata.tables[table_name]
+        edges[table_name] = [
+            (fk.parent.name, fk.column.table.name)
+            for fk in table.foreign_keys
+            if fk.column.table.name in NODE_TABLES
+        ]
+    return edges
+
+
+class CityGraph:
+    def __init__(self) -> None:
+        self.graph = nx.Graph()
+        self.loaded = False
+        # A graph request that arrives while the startup preload is running waits for it instead of loading again
+        self._load_lock = asyncio.Lock()
+        # Changes committed while a load is running - the load may have read past them, so they are replayed onto
+        # the new graph before it is swapped in. None when no load is running
+        self._committed_during_load: Optional[list[tuple[str, Any, Any]]] = None
+        # Bumped on every change - anything derived from the graph can be cached against it
+        self.version = 0
+
+    async def load(self, session: AsyncSession) -> None:
+        # One load at a time - each one buffers the changes committed while it runs
+        async with self._load_lock:
+            await self._load(session)
+
+    async def _load(self, session: AsyncSession) -> None:
+        # Building the graph allocates around a million dicts and tuples, and each full collection along the way
+        # walks all of them - pauses of a second and more on a big database. Automatic collection is off while
+        # loading. The startup preload freezes the graph it loads (see main.preload_graph).
+        collecting = gc.isenabled()
+        gc.disable()
+        self._committed_during_load = []
+        try:
+            graph = await self._build(session)
+            # Replaying is idempotent, so changes the load already read are harmless
+            self._apply_to(graph, self._committed_during_load)
+        finally:
+            self._committed_during_load = None
+            if collecting:
+                gc.enable()
+
+        self.graph = graph
+        self.loaded = True
+        self.version += 1
+        logger.info(f"City graph loaded: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+
+    async def _build(self, session: AsyncSession) -> nx.Graph:
+        graph = nx.Graph()
+
+        async def batches(statement: Any) -> AsyncIterator[Sequence[Any]]:
+            # Streamed in batches so other requests get the event loop between them - this runs in the background
+            result = await session.stream(statement.execution_options(yield_per=LOAD_BATCH_SIZE))
+            async for rows in result.partitions():
+                yield rows
+
+        for table_name in NODE_TABLES:
+            table = SQLModel.metadata.tables[table_name]
+            async for ids in batches(select(table.c.id)):
+                graph.add_nodes_from((table_name, node_id) for node_id, in ids)
+            for column, target in FOREIGN_KEY_EDGES[table_name]:
+                statement = select(table.c.id, table.c[column]).where(table.c[column].is_not(None))
+                async for rows in batches(statement):
+                    graph.add_edges_from(((table_name, node_id), (target, target_id)) for node_id, target_id in rows)
+        for table_name, ((left, left_target), (right, right_target)) in LINK_TABLES.items():
+            table = SQLModel.metadata.tables[table_name]
+            async for rows in batches(select(table.c[left], table.c[right])):
+                graph.add_edges_from(((left_target, left_id), (right_target, right_id)) for left_id, right_id in rows)
+        return graph
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        async with self._load_lock:
+            if not self.loaded:
+                await self._load(session)
+
+    def apply(self, changes: Sequence[tuple[str, Any, Any]]) -> None:
+        """Committed changes - kept for the load in flight, if any, and applied to the current graph once loaded."""
+        if self._committed_during_load is not None:
+            self._committed_during_load.extend(changes)
+        if self.loaded and self._apply_to(self.graph, changes):
+            self.version += 1
+
+    @staticmethod
+    def _apply_to(graph: nx.Graph, changes: Iterable[tuple[str, Any, Any]]) -> bool:
+        changed = False
+        for change, first, second in changes:
+            if change == "add_node":
+                graph.add_node(first)
+            elif change == "remove_node" and first in graph:
+                graph.remove_node(first)
+            elif change == "add_edge":
+                graph.add_edge(first, second)
+            elif change == "remove_edge" and graph.has_edge(first, second):
+                graph.remove_edge(first, second)
+            else:
+                continue
+            changed = True
+        return changed
+
+    def has_node(self, node: Node) -> bool:
+        return node in self.graph
+
+    def k_hop(self, node: Node, depth: int, kind: Optional[str] = None) -> dict[Node, int]:
+        """Everything within `depth` hops of node (excluding node itself), with its distance."""
+        distances = nx.single_source_shortest_path_length(self.graph, node, cutoff=depth)
+        return {
+            other: distance for other, distance in distances.items()
+            if other != node and (kind is None or other[0] == kind)
+        }
+
+    def reach(self, node: Node, via: list[str]) -> set[Node]:
+        """Follows a chain of node kinds, e.g. via=["narrative", "tour"] from a site gives the tours that
+        reach narratives touching that site."""
+        frontier = {node}
+        for kind in via:
+            frontier = {
+                neighbour for current in frontier for neighbour in self.graph.adj[current] if neighbour[0] == kind
+            }
+        return frontier
+
+    def shortest_path(self, source: Node, target: Node) -> Optional[list[Node]]:
+        try:
+            return nx.shortest_path(self.graph, source, target)
+        except nx.NetworkXNoPath:
+            return None
+
+
+LINK_TABLES = _link_tables()
+FOREIGN_KEY_EDGES = _foreign_key_edges()
+city_graph = CityGraph()
+
+
+""" CHANGE TRACKING """
+# Changes are collected per session at flush time and only applied once the transaction commits.
+
+def _pending(session: OrmSession) -> list:
+    return session.info.setdefault("city_graph_changes", [])
+
+
+def record_edge_changes(session: OrmSession, table: Table, added: Iterable[tuple], removed: Iterable[tuple] = ()) -> None:
+    """For writes that bypass the ORM (bulk link statements) - pairs are (left id, right id) in key order."""
+    (_, left_target), (_, right_target) = LINK_TABLES[table.name]
+    pending = _pending(session)
+    pending.extend(("add_edge", (left_target, left), (right_target, right)) for left, right in added)
+    pending.extend(("remove_edge", (left_target, left), (right_target, right)) for left, right in removed)
+
+
+def record_node_changes(session: OrmSession, table: Table, added: Iterable[uuid.UUID]) -> None:
+    """For rows inserted without the ORM (bulk import)."""
+    _pending(session).extend(("add_node", (table.name, node_id), None) for node_id in added)
+
+
+def _instance_changes(instance: Any, deleted: bool = False, new: bool = False) -> list[tuple[str, Any, Any]]:
+    table = getattr(instance, "__table__", None)
+    if table is None:
+        return []
+    changes = []
+    if table.name in LINK_TABLES:
+        (left, left_target), (right, right_target) = LINK_TABLES[table.name]
+        edge = ((left_target, getattr(instance, left)), (right_target, getattr(instance, right)))
+        changes.append(("remove_edge" if deleted else "add_edge", *edge))
+        return changes
+    if table.name not in NODE_TABLES:
+        return []
+
+    node = (table.name, instance.id)
+    if deleted:
+        return [("remove_node", node, None)]
+    changes.append(("add_node", node, None))
+    state = inspect(instance)
+    for column, target in FOREIGN_KEY_EDGES[table.name]:
+        if new:
+            # Attribute history isn't reliable for freshly validated models - the current value is what was inserted
+            value = getattr(instance, column)
+            if value is not None:
+                changes.append(("add_edge", node, (target, value)))
+            continue
+        history = state.attrs[column].history
+        changes.extend(("remove_edge", node, (target, old)) for old in history.deleted if old is not None)
+        changes.extend(("add_edge", node, (target, new)) for new in history.added if new is not None)
+    # many:many appended/removed through relationship collections never show up as link instances
+    for relationship in state.mapper.relationships:
+        if relationship.secondary is None:
+            continue
+        history = state.attrs[relationship.key].history
+        for other in history.added:
+            changes.append(("add_edge", node, (other.__table__.name, other.id)))
+        for other in history.deleted:
+            changes.append(("remove_edge", node, (other.__table__.name, other.id)))
+    return changes
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_graph_changes(session: OrmSession, flush_context: Any) -> None:
+    pending = _pending(session)
+    for instance in session.new:
+        pending.extend(_instance_changes(instance, new=True))
+    for instance in session.dirty:
+        pending.extend(_instance_changes(instance))
+    for instance in session.deleted:
+        pending.extend(_instance_changes(instance, deleted=True))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _apply_graph_changes(session: OrmSession) -> None:
+    changes = session.info.pop("city_graph_changes", None)
+    if changes:
+        city_graph.apply(changes)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_graph_changes(session: OrmSession) -> None:
+    session.info.pop("city_graph_changes", None)
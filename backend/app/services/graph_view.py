@@ -0,0 +1,113 @@
+import json
+import uuid
+from collections import defaultdict
+from typing import Any, Literal
+
+import networkx as nx
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.services.city_graph import Node, city_graph
+
+
+""" GRAPH VIEWS """
+# Renders the neighbourhood of one entity as JSON (nodes, edges and positions) or as a standalone pyvis page.
+# The layout is computed once on the server and the output cached against the graph version, so repeat views
+# of a large hub are a dictionary lookup - any write that touches the graph bumps the version and the next
+# view is rendered fresh.
+
+ViewFormat = Literal["json", "html"]
+
+KIND_COLOURS = {
+    "experience": "#e15759",
+    "experiencecomponent": "#ff9da7",
+    "feasibility": "#bab0ac",
+    "narrative": "#4e79a7",
+    "substory": "#76b7b2",
+    "site": "#59a14f",
+    "cluster": "#edc948",
+    "artefact": "#b07aa1",
+    "hub": "#f28e2b",
+    "tour": "#9c755f",
+}
+
+# (kind, id, depth, format, graph version) -> rendered body
+view_cache = TTLCache(settings.GRAPH_VIEW_CACHE_SIZE, settings.GRAPH_VIEW_CACHE_TTL_SECONDS)
+
+
+def _name_column(kind: str) -> Any:
+    table = SQLModel.metadata.tables[kind]
+    return next(column for column in table.columns if column.name.endswith("_name"))
+
+
+def neighbourhood(node: Node, depth: int) -> nx.Graph:
+    distances = city_graph.k_hop(node, depth)
+    nearest = sorted(distances, key=lambda other: distances[other])[:settings.GRAPH_VIEW_MAX_NODES - 1]
+    return city_graph.graph.subgraph([node, *nearest]).copy()
+
+
+async def load_labels(session: AsyncSession, nodes: list[Node]) -> dict[Node, str]:
+    ids_by_kind: dict[str, list[uuid.UUID]] = defaultdict(list)
+    for kind, node_id in nodes:
+        ids_by_kind[kind].append(node_id)
+
+    labels = {}
+    for kind, ids in ids_by_kind.items():
+        table = SQLModel.metadata.tables[kind]
+        rows = await session.execute(select(table.c.id, _name_column(kind)).where(table.c.id.in_(ids)))
+        labels.update(((kind, node_id), name) for node_id, name in rows)
+    return labels
+
+
+def render(subgraph: nx.Graph, centre: Node, labels: dict[Node, str], view_format: ViewFormat) -> bytes:
+    # Fixed seed so the same subgraph always gets the same picture
+    positions = nx.spring_layout(subgraph, seed=0, scale=1000) if len(subgraph) > 1 else {centre: (0.0, 0.0)}
+    nodes = [
+        {
+            "id": f"{kind}:{node_id}",
+            "kind": kind,
+            "label": labels.get((kind, node_id)) or kind,
+            "x": round(float(positions[(kind, node_id)][0]), 2),
+            "y": round(float(positions[(kind, node_id)][1]), 2),
+            "centre": (kind, node_id) == centre,
+        }
+        for kind, node_id in subgraph.nodes
+    ]
+    edges = [
+        {"source": f"{left[0]}:{left[1]}", "target": f"{right[0]}:{right[1]}"}
+        for left, right in subgraph.edges
+    ]
+    if view_format == "json":
+        return json.dumps({"nodes": nodes, "edges": edges}).encode()
+
+    # pyvis pulls in IPython - imported on first use so it stays out of every worker's start up
+    from pyvis.network import Network
+
+    network = Network(height="800px", width="100%", cdn_resources="remote")
+    for node in nodes:
+        network.add_node(
+            node["id"], label=node["label"], title=node["kind"], x=node["x"], y=node["y"],
+            color=KIND_COLOURS.get(node["kind"]), size=25 if node["centre"] else 12, physics=False,
+        )
+    for edge in edges:
+        network.add_edge(edge["source"], edge["target"])
+    network.toggle_physics(False)
+    return network.generate_html().encode()
+
+
+async def render_view(session: AsyncSession, centre: Node, depth: int, view_format: ViewFormat) -> tuple[bytes, bool]:
+    """Returns (rendered body, whether it came from the cache)."""
+    key = (centre, depth, view_format, city_graph.version)
+    body = view_cache.get(key)
+    if body is not None:
+        return body, True
+
+    subgraph = neighbourhood(centre, depth)
+    labels = await load_labels(session, list(subgraph.nodes))
+    # Layout and HTML generation are CPU bound - keep them off the event loop
+    body = await run_in_threadpool(render, subgraph, centre, labels, view_format)
+    view_cache.set(key, body)
+    return body, False
@@ -0,0 +1,164 @@
+import uuid
+from typing import Any, Optional
+
+import numpy as np
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.core.table_versions import versions
+from backend.app.models.models import Cluster, Experience, ExperienceClusterLink, ExperienceHubLink, Feasibility, \
+    Hub, PortfolioBands, PortfolioGroup, PortfolioStats
+
+
+""" FEASIBILITY PORTFOLIO """
+# The portfolio view loads every experience with its feasibility study (plus the hub/cluster links) in three
+# queries, turns the columns into NumPy arrays and computes every total, weighted average, grouping and percentile
+# band from those arrays - groupings are bincounts over integer group codes rather than a loop per group.
+# Results are cached per owner until a write to any of the tables they are built from.
+
+PORTFOLIO_TABLES = ("experience", "feasibility", "experiencehublink", "experienceclusterlink", "hub", "cluster")
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# (owner id or None for everything, table versions) -> PortfolioStats
+portfolio_cache = TTLCache(256, settings.PORTFOLIO_CACHE_TTL_SECONDS)
+
+
+class PortfolioArrays:
+    def __init__(self, rows: list[Any]) -> None:
+        # The outer join repeats an experience that has more than one study - keep the first
+        first: dict[uuid.UUID, Any] = {}
+        for row in rows:
+            first.setdefault(row.id, row)
+        rows = list(first.values())
+
+        self.ids: list[uuid.UUID] = [row.id for row in rows]
+        self.index = {experience_id: position for position, experience_id in enumerate(self.ids)}
+        self.investment = np.array([row.investment for row in rows], dtype=float)
+        self.irr = np.array([row.feasibility_irr for row in rows], dtype=float)
+        self.roi = np.array([row.feasibility_roi for row in rows], dtype=float)
+        self.assessed = np.array([row.feasibility_id is not None for row in rows], dtype=float)
+        self.feasible = np.array([row.feasible is True for row in rows], dtype=float)
+        self.stage = [row.stage for row in rows]
+        self.status = [row.status for row in rows]
+
+        # Weighted averages only use experiences with a positive investment and a value to weight
+        investment = self.investment_amount = np.nan_to_num(self.investment)
+        self.irr_weight = np.where((investment > 0) & np.isfinite(self.irr), investment, 0.0)
+        self.roi_weight = np.where((investment > 0) & np.isfinite(self.roi), investment, 0.0)
+        self.irr_weighted = self.irr_weight * np.nan_to_num(self.irr)
+        self.roi_weighted = self.roi_weight * np.nan_to_num(self.roi)
+
+
+def _ratio(numerators: np.ndarray, denominators: np.ndarray) -> list[Optional[float]]:
+    return [float(n / d) if d > 0 else None for n, d in zip(numerators, denominators)]
+
+
+def _groups(arrays: PortfolioArrays, members: np.ndarray, codes: np.ndarray, keys: list[Optional[str]],
+            names: list[Optional[str]]) -> list[PortfolioGroup]:
+    """members[i] is an experience position and codes[i] the group it falls in - one bincount per metric."""
+    size = len(keys)
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, weights=values[members], minlength=size)
+
+    experiences = np.bincount(codes, minlength=size)
+    irr = _ratio(total(arrays.irr_weighted), total(arrays.irr_weight))
+    roi = _ratio(total(arrays.roi_weighted), total(arrays.roi_weight))
+    assessed, feasible, investment = total(arrays.assessed), total(arrays.feasible), total(arrays.investment_amount)
+    return [
+        PortfolioGroup(
+            key=keys[code],
+            name=names[code],
+            experiences=int(experiences[code]),
+            assessed=int(assessed[code]),
+            feasible=int(feasible[code]),
+            investment=float(investment[code]),
+            weighted_irr=irr[code],
+            weighted_roi=roi[code],
+        )
+        for code in np.argsort(-investment, kind="stable")
+    ]
+
+
+def _by_value(arrays: PortfolioArrays, values: list[Optional[str]]) -> list[PortfolioGroup]:
+    labels = np.array(["" if value is None else value for value in values], dtype=str)
+    keys, codes = np.unique(labels, return_inverse=True)
+    keys = [str(key) or None for key in keys]
+    return _groups(arrays, np.arange(len(values)), codes.ravel(), keys, keys)
+
+
+def _by_link(arrays: PortfolioArrays, links: list[Any]) -> list[PortfolioGroup]:
+    links = [link for link in links if link.experience_id in arrays.index]
+    if not links:
+        return []
+    group_ids = list(dict.fromkeys(link.group_id for link in links))
+    group_codes = {group_id: code for code, group_id in enumerate(group_ids)}
+    names = {link.group_id: link.name for link in links}
+    members = np.array([arrays.index[link.experience_id] for link in links], dtype=np.intp)
+    codes = np.array([group_codes[link.group_id] for link in links], dtype=np.intp)
+    return _groups(arrays, members, codes, [str(group_id) for group_id in group_ids], [names[group_id] for group_id in group_ids])
+
+
+def _bands(values: np.ndarray) -> PortfolioBands:
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return PortfolioBands()
+    return PortfolioBands(**{f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+
+
+def compute_portfolio(rows: list[Any], hub_links: list[Any], cluster_links: list[Any]) -> PortfolioStats:
+    arrays = PortfolioArrays(rows)
+    count = len(arrays.ids)
+    totals = _groups(arrays, np.arange(count), np.zeros(count, dtype=np.intp), [None], [None])[0]
+    return PortfolioStats(
+        totals=totals,
+        investment_bands=_bands(arrays.investment),
+        irr_bands=_bands(arrays.irr),
+        roi_bands=_bands(arrays.roi),
+        by_stage=_by_value(arrays, arrays.stage) if count else [],
+        by_status=_by_value(arrays, arrays.status) if count else [],
+        by_hub=_by_link(arrays, hub_links),
+        by_cluster=_by_link(arrays, cluster_links),
+    )
+
+
+async def get_portfolio(session: AsyncSession, owner_id: Optional[uuid.UUID] = None) -> PortfolioStats:
+    key = (owner_id, versions(*PORTFOLIO_TABLES))
+    stats = portfolio_cache.get(key)
+    if stats is not None:
+        return stats
+
+    experiences = (
+        select(
+            Experience.id, Experience.investment, Experience.stage, Experience.status,
+            Feasibility.id.label("feasibility_id"), Feasibility.feasibility_irr, Feasibility.feasibility_roi,
+            Feasibility.feasible,
+        )
+        .outerjoin(Feasibility, Feasibility.experience_id == Experience.id)
+        .order_by(Experience.id)
+    )
+    hub_links = (
+        select(ExperienceHubLink.experience_id, Hub.id.label("group_id"), Hub.hub_name.label("name"))
+        .join(Hub, Hub.id == ExperienceHubLink.hub_id)
+    )
+    cluster_links = (
+        select(ExperienceClusterLink.experience_id, Cluster.id.label("group_id"), Cluster.cluster_name.label("name"))
+        .join(Cluster, Cluster.id == ExperienceClusterLink.cluster_id)
+    )
+    if owner_id is not None:
+        experiences = experiences.where(Experience.owner_id == owner_id)
+        # Only the owner's links - not every link in the table
+        owned = select(Experience.id).where(Experience.owner_id == owner_id)
+        hub_links = hub_links.where(ExperienceHubLink.experience_id.in_(owned))
+        cluster_links = cluster_links.where(ExperienceClusterLink.experience_id.in_(owned))
+
+    rows = list((await session.execute(experiences)).all())
+    hub_rows = list((await session.execute(hub_links)).all())
+    cluster_rows = list((await session.execute(cluster_links)).all())
+    # Keep the NumPy work off the event loop
+    stats = await run_in_threadpool(compute_portfolio, rows, hub_rows, cluster_rows)
+    portfolio_cache.set(key, stats)
+    return stats
@@ -0,0 +1,170 @@
+import uuid
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.core.table_versions import record_table_writes
+from backend.app.models.models import Site, SiteTourLink, Tour, TourRoute, TourStop
+
+
+""" TOUR ROUTES """
+# A tour visits its linked sites in the order that keeps the walk short: sites are placed at the centre of their
+# boundary box, a haversine distance matrix is built in one vectorised step, and the order comes from
+# nearest-neighbour followed by 2-opt. Routes are open paths - a tour doesn't have to end where it started.
+# Sites without a boundary can't be placed, so they go at the end of the route with no leg length.
+# Routes are re-optimised whenever a tour's site-tour links change (crud.links), and on POST /tours/{id}/route.
+
+EARTH_RADIUS_KM = 6371.0088
+MAX_TWO_OPT_PASSES = 50
+
+# (site id, lat, lon) of every placed site -> (site ids in visit order, leg lengths)
+route_cache = TTLCache(settings.TOUR_ROUTE_CACHE_SIZE, ttl=float("inf"))
+
+
+def centroid(site: Site) -> Optional[tuple[float, float]]:
+    bounds = (site.site_boundary_north, site.site_boundary_south, site.site_boundary_east, site.site_boundary_west)
+    if any(bound is None for bound in bounds):
+        return None
+    north, south, east, west = bounds
+    return (north + south) / 2, (east + west) / 2
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Great circle distance in km between every pair of points."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour(distances: np.ndarray, start: int) -> np.ndarray:
+    count = len(distances)
+    route = np.empty(count, dtype=np.intp)
+    visited = np.zeros(count, dtype=bool)
+    current = start
+    for position in range(count):
+        route[position] = current
+        visited[current] = True
+        if position < count - 1:
+            current = int(np.argmin(np.where(visited, np.inf, distances[current])))
+    return route
+
+
+def two_opt(route: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """Reverses segments while that shortens the closed route - each pass tries every segment end for a given
+    start in one vectorised step."""
+    count = len(route)
+    # Three stops or fewer close into a single tour whichever way round - and there is no segment to reverse
+    if count < 4:
+        return route
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(count - 2):
+            a, b = route[i], route[i + 1]
+            j = np.arange(i + 2, count if i > 0 else count - 1)
+            c, d = route[j], route[(j + 1) % count]
+            gain = distances[a, b] + distances[c, d] - distances[a, c] - distances[b, d]
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                route[i + 1:j[best] + 1] = route[i + 1:j[best] + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return route
+
+
+def optimise(lat: np.ndarray, lon: np.ndarray) -> tuple[list[int], list[float]]:
+    """Returns (visit order as indexes into lat/lon, leg lengths in km)."""
+    count = len(lat)
+    if count < 2:
+        return list(range(count)), [0.0] * count
+    distances = haversine_matrix(lat, lon)
+
+    # A dummy stop at zero distance from everything turns the open path into a closed tour, so plain 2-opt also
+    # picks the best start and end; cutting the tour at the dummy gives the path back
+    closed = np.zeros((count + 1, count + 1))
+    closed[:count, :count] = distances
+    # Start from the site furthest from the rest - open paths usually begin at an extremity
+    start = int(np.argmax(distances.sum(axis=1)))
+    route = two_opt(np.concatenate(([count], nearest_neighbour(distances, start))), closed)
+    cut = int(np.flatnonzero(route == count)[0])
+    order = [int(index) for index in np.roll(route, -cut)[1:]]
+
+    legs = [0.0] + [float(distances[previous, current]) for previous, current in zip(order, order[1:])]
+    return order, legs
+
+
+async def _tour_sites(session: AsyncSession, tour_id: uuid.UUID) -> list[tuple[Site, Optional[int]]]:
+    statement = (
+        select(Site, SiteTourLink.visit_order)
+        .join(SiteTourLink, SiteTourLink.site_id == Site.id)
+        .where(SiteTourLink.tour_id == tour_id)
+        .order_by(SiteTourLink.visit_order.nulls_last(), Site.site_name)
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def get_route(session: AsyncSession, tour: Tour) -> TourRoute:
+    """The stored route, without recomputing anything."""
+    rows = await _tour_sites(session, tour.id)
+    stops = [TourStop(site_id=site.id, site_name=site.site_name, visit_order=visit_order) for site, visit_order in rows]
+    return TourRoute(
+        tour_id=tour.id,
+        stops=stops,
+        tour_length=tour.tour_length,
+        tour_time=tour.tour_time,
+        optimised=bool(stops) and all(stop.visit_order is not None for stop in stops),
+    )
+
+
+async def optimise_route(session: AsyncSession, tour: Tour) -> TourRoute:
+    """Orders the tour's sites, stores the order on SiteTourLink and fills in tour_length and tour_time."""
+    rows = await _tour_sites(session, tour.id)
+    placed = [(site, centroid(site)) for site, _ in rows if centroid(site) is not None]
+    unplaced = [site for site, _ in rows if centroid(site) is None]
+
+    placed.sort(key=lambda item: item[0].id)
+    key = tuple((site.id, lat, lon) for site, (lat, lon) in placed)
+    cached: Any = route_cache.get(key)
+    if cached is None:
+        lat = np.array([point[0] for _, point in placed], dtype=float)
+        lon = np.array([point[1] for _, point in placed], dtype=float)
+        order, legs = await run_in_threadpool(optimise, lat, lon)
+        cached = ([placed[index][0].id for index in order], legs)
+        route_cache.set(key, cached)
+    ordered_ids, legs = cached
+
+    sites = {site.id: site for site, _ in rows}
+    ordered = [sites[site_id] for site_id in ordered_ids] + unplaced
+    if ordered:
+        table = SiteTourLink.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.tour_id == tour.id, table.c.site_id == bindparam("b_site_id"))
+            .values(visit_order=bindparam("b_visit_order")),
+            [{"b_site_id": site.id, "b_visit_order": position} for position, site in enumerate(ordered)],
+        )
+        record_table_writes(session.sync_session, table.name)
+
+    tour.tour_length = round(sum(legs), 3) if ordered_ids else None
+    tour.tour_time = round(tour.tour_length / settings.TOUR_WALKING_SPEED_KMH * 60, 1) if ordered_ids else None
+    session.add(tour)
+    await session.commit()
+
+    stops = [
+        TourStop(
+            site_id=site.id,
+            site_name=site.site_name,
+            visit_order=position,
+            leg_length=(round(legs[position], 3) if position < len(legs) and position > 0 else None),
+        )
+        for position, site in enumerate(ordered)
+    ]
+    return TourRoute(tour_id=tour.id, stops=stops, tour_length=tour.tour_length, tour_time=tour.tour_time, optimised=True)
@@ -0,0 +1,56 @@
+"""Cold start time: the prestart step (wait for the database and sync the schema, as start.sh runs it) and the time
+from launching uvicorn to /health/ready answering 200. Each is run --runs times and the run fails if the median of
+either goes over its target.
+
+    python -m backend.benchmarks.cold_start
+    python -m backend.benchmarks.cold_start --runs 5 --ready-target 3
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+from backend.benchmarks.load import REPO_ROOT, serve
+from backend.benchmarks.seed import seed_users
+
+
+def time_prestart() -> float:
+    started = time.perf_counter()
+    for module in ("backend.app.db_connection_check", "backend.app.initial_data"):
+        subprocess.run([sys.executable, "-m", module], cwd=REPO_ROOT, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def time_ready(workers: int) -> float:
+    started = time.perf_counter()
+    with serve(workers):
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to time - the median is reported")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--prestart-target", type=float, default=5.0, help="Seconds allowed for the prestart step")
+    parser.add_argument("--ready-target", type=float, default=5.0, help="Seconds allowed from launch to ready")
+    args = parser.parse_args()
+
+    # The first prestart after a model change does the full schema sync - time the steady state after it
+    asyncio.run(seed_users())
+
+    failed = False
+    for name, measure, target in (
+        ("prestart", time_prestart, args.prestart_target),
+        ("ready", lambda: time_ready(args.workers), args.ready_target),
+    ):
+        timings = [measure() for _ in range(args.runs)]
+        median = statistics.median(timings)
+        print(f"{name:<10} median {median:.2f}s  runs {', '.join(f'{timing:.2f}' for timing in timings)}  target {target:.2f}s")
+        failed = failed or median > target
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Load benchmark. Starts the app under uvicorn (or uses --base-url), drives every router at a fixed concurrency and
+reports throughput and p50/p95/p99 latency per endpoint. Results are compared with a baseline file and the run fails
+if any endpoint got slower, lost throughput or started returning errors beyond --tolerance.
+
+Seed a scratch database once, record a baseline, then compare against it after each change:
+
+    python -m backend.benchmarks.load --seed 50000 --save-baseline
+    python -m backend.benchmarks.load
+
+Numbers only compare between runs on the same machine, data and options - keep the baseline with the machine.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import httpx
+
+from backend.app.core.config import settings
+from backend.benchmarks.seed import BENCH_PASSWORD, bench_email, seed, seed_users
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+BBOX = "-0.2,51.45,-0.1,51.55"
+# Latency changes smaller than this are noise whatever the percentage
+MIN_REGRESSION_MS = 2.0
+
+
+def endpoints(ids: dict[str, str]) -> dict[str, tuple[str, str, str, float, Optional[dict[str, Any]]]]:
+    """name -> (method, path, who, share of --requests, JSON body). Login is bcrypt bound, so it gets fewer."""
+    narrative = {
+        "narrative_name": "Load test narrative", "narrative_description": "Created by the load benchmark",
+        "hub_id": ids["hubs"], "site_ids": ids["sites"], "substory_ids": ids["substories"],
+        "artefact_ids": ids["artefacts"],
+    }
+    return {
+        "login": ("POST", "/login/access-token", "anonymous", 0.1, None),
+        "users.me": ("GET", "/users/me", "owner", 1, None),
+        "users.list": ("GET", "/users/?limit=50", "admin", 1, None),
+        "narratives.list": ("GET", "/narratives/?limit=50", "admin", 1, None),
+        "narratives.detail": ("GET", f"/narratives/{ids['narratives']}", "admin", 1, None),
+        "narratives.graph": ("GET", f"/narratives/{ids['narratives']}/graph", "admin", 1, None),
+        "narratives.create": ("POST", "/narratives/", "admin", 0.25, narrative),
+        "sites.list": ("GET", "/sites/?limit=50", "admin", 1, None),
+        "sites.bbox": ("GET", f"/sites/?bbox={BBOX}&limit=50", "admin", 1, None),
+        "sites.detail": ("GET", f"/sites/{ids['sites']}", "admin", 1, None),
+        "tours.list": ("GET", "/tours/?limit=50", "admin", 1, None),
+        "tours.detail": ("GET", f"/tours/{ids['tours']}", "admin", 1, None),
+        "tours.route": ("GET", f"/tours/{ids['tours']}/route", "admin", 1, None),
+        "experiences.list": ("GET", "/experiences/?limit=50", "owner", 1, None),
+        "experiences.detail": ("GET", f"/experiences/{ids['experiences']}", "owner", 1, None),
+        "experiences.portfolio": ("GET", "/experiences/portfolio", "owner", 1, None),
+        "experience_components.list": ("GET", "/experience_components/?limit=50", "owner", 1, None),
+        "experience_components.detail": ("GET", f"/experience_components/{ids['experience_components']}", "owner", 1, None),
+        "substories.list": ("GET", "/substories/?limit=50", "admin", 1, None),
+        "substories.detail": ("GET", f"/substories/{ids['substories']}", "admin", 1, None),
+        "artefacts.list": ("GET", "/artefacts/?limit=50", "admin", 1, None),
+        "hubs.list": ("GET", "/hubs/?limit=50", "admin", 1, None),
+        "clusters.list": ("GET", "/clusters/?limit=50", "admin", 1, None),
+        "search": ("GET", "/search/?q=12345&limit=20", "admin", 1, None),
+        "graph.neighbours": ("GET", f"/graph/site/{ids['sites']}/neighbours?depth=2", "admin", 1, None),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve(workers: int) -> Iterator[str]:
+    """The app under uvicorn in a child process - the same server stack as production, minus the proxy."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=os.environ.copy(),
+    )
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start within 120s")
+            time.sleep(0.05)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict[str, str]:
+    response = await client.post("/login/access-token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def first_ids(client: httpx.AsyncClient, admin: dict[str, str], owner: dict[str, str]) -> dict[str, str]:
+    ids = {}
+    for key in ("narratives", "sites", "tours", "substories", "artefacts", "hubs", "experiences", "experience_components"):
+        headers = owner if key in ("experiences", "experience_components") else admin
+        response = await client.get(f"/{key}/?limit=1&fields=id", headers=headers)
+        response.raise_for_status()
+        rows = response.json()[key]
+        if not rows:
+            raise SystemExit(f"No {key} to benchmark against - seed the database first (--seed)")
+        ids[key] = rows[0]["id"]
+    return ids
+
+
+async def measure(client: httpx.AsyncClient, method: str, path: str, headers: dict[str, str],
+                  body: Optional[dict[str, Any]], data: Optional[dict[str, str]], total: int,
+                  concurrency: int) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    # Shared by every worker - taking the next number never awaits, so each request is sent exactly once
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=body, data=data)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def run(base_url: str, args: argparse.Namespace) -> dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin = await login(client, settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD)
+        owner = await login(client, bench_email(0), BENCH_PASSWORD)
+        headers = {"admin": admin, "owner": owner, "anonymous": {}}
+        credentials = {"username": bench_email(0), "password": BENCH_PASSWORD}
+
+        results = {}
+        for name, (method, path, who, share, body) in endpoints(await first_ids(client, admin, owner)).items():
+            if args.endpoint and name not in args.endpoint:
+                continue
+            data = credentials if name == "login" else None
+            total = max(int(args.requests * share), args.concurrency)
+            # Warm caches and connections first - the baseline is steady state, not the first request
+            await measure(client, method, path, headers[who], body, data, min(args.warmup, total), args.concurrency)
+            results[name] = await measure(client, method, path, headers[who], body, data, total, args.concurrency)
+            print(f"{name:<32}{results[name]['throughput']:>10.1f}{results[name]['p50_ms']:>10.1f}"
+                  f"{results[name]['p95_ms']:>10.1f}{results[name]['p99_ms']:>10.1f}{results[name]['errors']:>8}")
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if result[key] > before[key] * (1 + tolerance) and result[key] - before[key] > MIN_REGRESSION_MS:
+                regressions.append(f"{name}: {key} {before[key]} -> {result[key]}")
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput']} -> {result['throughput']} req/s")
+        if result["errors"] > before["errors"] * (1 + tolerance):
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Add this many rows per entity table first")
+    parser.add_argument("--users", type=int, default=50, help="Bench users the seeded rows are shared between")
+    parser.add_argument("--base-url", help="Benchmark a server that is already running instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--endpoint", action="append", help="Only these endpoints (repeatable)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before failing")
+    parser.add_argument("--output", type=Path, help="Also write this run's results here")
+    args = parser.parse_args()
+
+    asyncio.run(seed(args.seed, args.users) if args.seed else seed_users())
+
+    options = {key: getattr(args, key) for key in ("workers", "concurrency", "requests", "warmup")}
+    print(f"{'endpoint':<32}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    with contextlib.nullcontext(args.base_url) if args.base_url else serve(args.workers) as base_url:
+        results = asyncio.run(run(base_url, args))
+    report = {"options": options, "endpoints": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline} - record one with --save-baseline")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["options"] != options:
+        print(f"WARNING: baseline was recorded with {baseline['options']}, this run used {options}")
+    regressions = compare(results, baseline["endpoints"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Query plan regression check. Calls the API routes in-process, records every SQL statement they send, runs
+EXPLAIN on each one and fails if a plan filters a large table with a sequential scan or nests a loop over a
+sequential scan - the two shapes a missing or unusable index shows up as. Also fails on foreign keys without an index, which only
+hurt on parent deletes (Postgres' own RI checks never show up in the statements recorded here).
+
+Run it against a seeded database - on a near empty one every plan is a sequential scan and nothing is checked:
+
+    python -m backend.benchmarks.query_plans --seed 50000
+    python -m backend.benchmarks.query_plans
+
+backend/tests/test_query_plans.py runs the same check under pytest, seeding TEST_POSTGRES_DB first.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Iterator
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine
+from backend.benchmarks.seed import BENCH_PASSWORD, bench_email, seed, seed_users
+
+ENTITIES = ["experiences", "experience_components", "narratives", "substories", "sites", "clusters", "artefacts",
+            "hubs", "tours"]
+OWNED = ["experiences", "experience_components"]
+ENTITY_TABLES = ["experience", "experiencecomponent", "narrative", "substory", "site", "cluster", "artefact", "hub", "tour"]
+BBOX = "-0.2,51.45,-0.1,51.55"
+# A filter the planner expects to keep less than this share of a table should be using an index
+SELECTIVE_FRACTION = 0.1
+
+
+def login(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post("/login/access-token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def exercise(client: TestClient, admin: dict[str, str], owner: dict[str, str]) -> None:
+    """Every read route, first and second page, as the superuser and (for owned tables) as an owner."""
+    def get(path: str, headers: dict[str, str]) -> Any:
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    for entity in ENTITIES:
+        for headers in (admin, owner) if entity in OWNED else (admin,):
+            page = get(f"/{entity}/?limit=50", headers)
+            if page["next_cursor"]:
+                get(f"/{entity}/?limit=50&cursor={page['next_cursor']}", headers)
+            if page[entity]:
+                get(f"/{entity}/{page[entity][0]['id']}", headers)
+                get(f"/{entity}/{page[entity][0]['id']}?fields=id", headers)
+    for entity in ("sites", "hubs", "clusters"):
+        get(f"/{entity}/?bbox={BBOX}", admin)
+
+    narrative = get("/narratives/?limit=1", admin)["narratives"]
+    if narrative:
+        get(f"/narratives/{narrative[0]['id']}/graph", admin)
+    tour = get("/tours/?limit=1", admin)["tours"]
+    if tour:
+        get(f"/tours/{tour[0]['id']}/route", admin)
+    artefact = get("/artefacts/?limit=1", admin)["artefacts"]
+    if artefact:
+        get(f"/artefacts/{artefact[0]['id']}/media", admin)
+    # A selective term - one that matches most rows is rightly answered with a sequential scan
+    get("/search/?q=12345&limit=20", admin)
+    get("/experiences/portfolio", owner)
+
+
+def record_statements(client: TestClient, admin: dict[str, str], owner: dict[str, str]) -> list[tuple[str, Any]]:
+    statements: dict[str, Any] = {}
+
+    def before_cursor_execute(connection: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                              executemany: bool) -> None:
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            statements.setdefault(statement, parameters[0] if executemany else parameters)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        exercise(client, admin, owner)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return list(statements.items())
+
+
+def plan_nodes(node: dict[str, Any], inner: bool = False) -> Iterator[tuple[dict[str, Any], bool]]:
+    """Every node with whether it sits on the inner (repeated) side of a nested loop."""
+    yield node, inner
+    for position, child in enumerate(node.get("Plans", [])):
+        yield from plan_nodes(child, inner or (node["Node Type"] == "Nested Loop" and position == 1))
+
+
+def check_plan(plan: dict[str, Any], table_rows: dict[str, float], min_rows: int) -> list[str]:
+    problems = []
+    for node, inner in plan_nodes(plan):
+        table = node.get("Relation Name")
+        rows = table_rows.get(table, 0)
+        # Walking a whole index for its order and filtering every row - e.g. the primary key for ORDER BY id
+        if node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node and "Filter" in node:
+            if rows >= min_rows:
+                problems.append(f"filtered full scan of {node['Index Name']} ({rows:.0f} rows): {node['Filter']}")
+            continue
+        if node["Node Type"] != "Seq Scan":
+            continue
+        if inner and rows >= min_rows / 10:
+            problems.append(f"nested loop over a sequential scan of {table} ({rows:.0f} rows)")
+        # A scan without a filter is the planner choosing to hash join the whole table, which is often right, and
+        # so is one whose filter keeps most of it (a bulk load) - a selective one is a WHERE clause no index serves
+        elif rows >= min_rows and "Filter" in node and node.get("Plan Rows", 0) < rows * SELECTIVE_FRACTION:
+            problems.append(f"filtered sequential scan of {table} ({rows:.0f} rows): {node['Filter']}")
+    return problems
+
+
+def unindexed_foreign_keys() -> list[str]:
+    problems = []
+    for table in SQLModel.metadata.sorted_tables:
+        leading = {index.columns[0].name for index in table.indexes if index.columns}
+        leading.add(table.primary_key.columns[0].name)
+        for column in table.columns:
+            if column.foreign_keys and column.name not in leading:
+                problems.append(f"{table.name}.{column.name} references {next(iter(column.foreign_keys)).target_fullname} without an index")
+    return problems
+
+
+async def explain(statements: list[tuple[str, Any]], min_rows: int, show_plans: bool = False) -> list[str]:
+    # A separate engine - the app's pool belongs to the event loop the test client ran on
+    engine = create_async_engine(str(settings.ASYNC_DATABASE_URI), poolclass=NullPool)
+    problems = []
+    try:
+        async with engine.connect() as connection:
+            table_rows = dict((await connection.execute(text(
+                "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+            ))).all())
+            small = [name for name in ENTITY_TABLES if table_rows.get(name, 0) < min_rows]
+            if small:
+                print(f"WARNING: {', '.join(small)} have fewer than {min_rows} rows - seed first (--seed) or those plans aren't checked")
+            raw_connection = (await connection.get_raw_connection()).driver_connection
+            for statement, parameters in statements:
+                plan = await raw_connection.fetchval(f"EXPLAIN (FORMAT JSON) {statement}", *(parameters or ()))
+                # SQLAlchemy's asyncpg dialect installs a json codec on its connections - plain asyncpg returns text
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                found = check_plan(plan[0]["Plan"], table_rows, min_rows)
+                if found and show_plans:
+                    lines = await raw_connection.fetch(f"EXPLAIN {statement}", *(parameters or ()))
+                    found = [f"{problem}\n{statement}\n" + "\n".join(line[0] for line in lines) for problem in found]
+                else:
+                    found = [f"{problem}\n    {' '.join(statement.split())[:300]}" for problem in found]
+                problems.extend(found)
+    finally:
+        await engine.dispose()
+    return problems
+
+
+def run_checks(min_rows: int, show_plans: bool = False) -> tuple[int, list[str]]:
+    """Exercises the app and returns the number of statements checked and the problems found."""
+    from backend.app.main import app
+    with TestClient(app) as client:
+        admin = login(client, settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD)
+        owner = login(client, bench_email(0), BENCH_PASSWORD)
+        statements = record_statements(client, admin, owner)
+    return len(statements), unindexed_foreign_keys() + asyncio.run(explain(statements, min_rows, show_plans))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Add this many rows per entity table first")
+    parser.add_argument("--min-rows", type=int, default=10000,
+                        help="Tables smaller than this may be scanned - the planner is right to on small tables")
+    parser.add_argument("--show-plans", action="store_true", help="Print the full statement and plan of each failure")
+    args = parser.parse_args()
+
+    asyncio.run(seed(args.seed) if args.seed else seed_users())
+
+    checked, problems = run_checks(args.min_rows, args.show_plans)
+    print(f"{checked} statements checked")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
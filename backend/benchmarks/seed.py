@@ -0,0 +1,175 @@
+"""Fills the database with synthetic rows so plans and timings look like production rather than an empty dev
+database. Rows are added to whatever is there (nothing is deleted) - point it at a scratch database:
+
+    python -m backend.benchmarks.seed --rows 50000
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import uuid
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import String, Table, text
+from sqlmodel import SQLModel, select
+from sqlmodel.sql.sqltypes import AutoString
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.db import async_engine, init_db
+from backend.app.core.security import get_password_hash
+from backend.app.crud import crud
+from backend.app.crud.counts import ALL_OWNERS, apply_count_deltas
+from backend.app.crud.links import LINK_MODELS
+from backend.app.models.models import ArtefactMedia, EntityCount, User
+
+BENCH_PASSWORD = "benchmark-password"
+SKIPPED_TABLES = {User.__table__.name, EntityCount.__table__.name, ArtefactMedia.__table__.name}
+LINK_TABLES = {model.__table__.name for model in LINK_MODELS.values()}
+COPY_CHUNK_SIZE = 10000
+
+
+def bench_email(number: int) -> str:
+    return f"bench-{number}@example.com"
+
+
+async def ensure_users(session: AsyncSession, count: int) -> list[User]:
+    """The bench-N@example.com users (created when missing), all with BENCH_PASSWORD."""
+    existing = {
+        user.email: user
+        for user in (await session.exec(select(User).where(User.email.in_([bench_email(n) for n in range(count)])))).all()
+    }
+    # One bcrypt hash shared by every new user - hashing per user would dominate seeding
+    hashed_password = get_password_hash(BENCH_PASSWORD) if len(existing) < count else None
+    users = [
+        existing.get(bench_email(number)) or User(email=bench_email(number), hashed_password=hashed_password)
+        for number in range(count)
+    ]
+    session.add_all(users)
+    await session.commit()
+    return users
+
+
+def _value(table: Table, column: Any, row: int, ids: dict[str, list[uuid.UUID]], owners: list[uuid.UUID],
+           centre: tuple[float, float]) -> Any:
+    if column.name == "owner_id":
+        return random.choice(owners)
+    if column.foreign_keys:
+        parent = next(iter(column.foreign_keys)).column.table.name
+        return random.choice(ids[parent]) if ids.get(parent) else None
+    if column.primary_key:
+        return uuid.uuid4()
+    if column.name.endswith("_boundary_north") or column.name.endswith("_boundary_south"):
+        return centre[0] + (0.001 if column.name.endswith("north") else -0.001)
+    if column.name.endswith("_boundary_east") or column.name.endswith("_boundary_west"):
+        return centre[1] + (0.001 if column.name.endswith("east") else -0.001)
+    # sqlmodel's AutoString doesn't report a python_type
+    python_type = str if isinstance(column.type, (AutoString, String)) else column.type.python_type
+    if python_type is str:
+        return f"{table.name} {row} {random.choice(('draft', 'live', 'archived'))}"[:column.type.length or 255]
+    if python_type is float:
+        return round(random.uniform(0, 1000), 2)
+    if python_type is int:
+        return row
+    if python_type is bool:
+        return random.random() < 0.5
+    if python_type is uuid.UUID:
+        return uuid.uuid4()
+    if python_type is datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc)
+    return None
+
+
+def table_records(table: Table, rows: int, ids: dict[str, list[uuid.UUID]], owners: list[uuid.UUID],
+                  existing: set[tuple]) -> tuple[list[str], list[tuple]]:
+    # Generated and server defaulted columns are left to Postgres, as in bulk imports
+    columns = [column for column in table.columns if column.computed is None and column.server_default is None]
+    records, seen = [], set(existing)
+    for row in range(rows):
+        # Somewhere around central London, so bbox queries select a realistic fraction of the rows
+        centre = (random.uniform(51.3, 51.7), random.uniform(-0.5, 0.3))
+        record = tuple(_value(table, column, row, ids, owners, centre) for column in columns)
+        key = tuple(value for column, value in zip(columns, record) if column.primary_key)
+        if key in seen or any(value is None for value in key):
+            continue
+        seen.add(key)
+        records.append(record)
+    return [column.name for column in columns], records
+
+
+async def seed(rows: int, users: int = 50) -> list[User]:
+    """Adds `rows` rows to every entity table and twice that to every link table. Returns the bench users."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await init_db(session)
+        bench_users = await ensure_users(session, users)
+        # Many owners, each with a small share of the rows - owner filtered plans look like they do in production
+        owners = [user.id for user in bench_users]
+        owners.append((await crud.get_user_by_email(session, settings.FIRST_SUPERUSER)).id)
+
+        ids: dict[str, list[uuid.UUID]] = {}
+        connection = await session.connection()
+        raw_connection = (await connection.get_raw_connection()).driver_connection
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name in SKIPPED_TABLES:
+                continue
+            # Link keys are random pairs of existing ids - the pairs already there must not be drawn again
+            existing = set((await session.execute(select(*[column for column in table.columns if column.primary_key]))).all()) if table.name in LINK_TABLES else set()
+            columns, records = table_records(table, rows * 2 if table.name in LINK_TABLES else rows, ids, owners, existing)
+            for start in range(0, len(records), COPY_CHUNK_SIZE):
+                await raw_connection.copy_records_to_table(
+                    table.name, records=records[start:start + COPY_CHUNK_SIZE], columns=columns
+                )
+            if "id" in columns:
+                ids[table.name] = (await session.exec(select(table.c.id))).all()
+                # COPY bypasses the ORM, so the row counters have to be told about the new rows
+                deltas = Counter({(table, ALL_OWNERS): len(records)})
+                if "owner_id" in columns:
+                    owner_index = columns.index("owner_id")
+                    deltas.update((table, record[owner_index]) for record in records)
+                await session.run_sync(lambda sync_session: apply_count_deltas(sync_session.connection(), deltas))
+            print(f"{table.name:<28}{len(records):>10} rows")
+        await session.commit()
+
+    # Fresh statistics, or the planner still thinks the tables are empty - and VACUUM so the GIN search indexes
+    # merge their pending lists and are costed the way they will be once autovacuum has caught up
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM ANALYZE"))
+    # The pool's connections belong to this event loop - callers go on to run the app on another one
+    await async_engine.dispose()
+    return bench_users
+
+
+async def seed_to(rows: int, users: int = 50) -> list[User]:
+    """Tops the entity tables up to about `rows` rows each - only what the emptiest one is missing is added."""
+    tables = [
+        table for table in SQLModel.metadata.sorted_tables
+        if table.name not in SKIPPED_TABLES | LINK_TABLES and "id" in table.c
+    ]
+    bench_users = await seed_users(users)
+    async with async_engine.connect() as connection:
+        smallest = min([(await connection.execute(text(f'SELECT count(*) FROM "{table.name}"'))).scalar()
+                        for table in tables])
+    await async_engine.dispose()
+    return await seed(rows - smallest, users) if smallest < rows else bench_users
+
+
+async def seed_users(users: int = 1) -> list[User]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await init_db(session)
+        bench_users = await ensure_users(session, users)
+    await async_engine.dispose()
+    return bench_users
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="Rows added to each entity table")
+    parser.add_argument("--users", type=int, default=50, help="Bench users the rows are shared between")
+    args = parser.parse_args()
+    asyncio.run(seed(args.rows, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Per entity list serialisation: the old path (ORM objects -> *sPublic model -> FastAPI response_model validation ->
+stdlib json) against the fast path in backend/app/api/serialisation.py (row tuples -> orjson).
+
+Runs in memory, no database needed:
+
+    python -m backend.benchmarks.serialisation --rows 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from typing import Any, get_args
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.app.api.serialisation import encode_page, item_model, public_columns
+from backend.app.models.models import Artefact, ArtefactsPublic, Cluster, ClustersPublic, Experience, \
+    ExperienceComponent, ExperienceComponentsPublic, ExperiencesPublic, Hub, HubsPublic, Narrative, \
+    NarrativesPublic, Site, SitesPublic, SubstoriesPublic, Substory, Tour, ToursPublic
+
+ENTITIES: dict[str, tuple[Any, Any]] = {
+    "experiences": (Experience, ExperiencesPublic),
+    "experience_components": (ExperienceComponent, ExperienceComponentsPublic),
+    "narratives": (Narrative, NarrativesPublic),
+    "substories": (Substory, SubstoriesPublic),
+    "sites": (Site, SitesPublic),
+    "clusters": (Cluster, ClustersPublic),
+    "artefacts": (Artefact, ArtefactsPublic),
+    "hubs": (Hub, HubsPublic),
+    "tours": (Tour, ToursPublic),
+}
+
+
+def sample_value(column: Any, annotation: Any, row: int) -> Any:
+    python_type = next((arg for arg in get_args(annotation) if arg is not type(None)), annotation)
+    if python_type is uuid.UUID:
+        return uuid.uuid4()
+    if python_type is str:
+        # Every text column filled to its limit - the documentation fields are the 2,000 character ones
+        return ("lorem ipsum " * 200)[:getattr(column.type, "length", None) or 255]
+    if python_type is float:
+        return row * 0.125
+    if python_type is bool:
+        return row % 2 == 0
+    if python_type is int:
+        return row
+    return None
+
+
+def timed(function: Any, repeat: int) -> tuple[float, Any]:
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+def benchmark(key: str, rows: int, repeat: int) -> tuple[float, float]:
+    model, list_model = ENTITIES[key]
+    public_model = item_model(list_model, key)
+    columns = public_columns(model, public_model)
+    names = [column.name for column in columns]
+    annotations = {name: field.annotation for name, field in public_model.model_fields.items()}
+    values = [{column.name: sample_value(column, annotations[column.name], row) for column in columns} for row in range(rows)]
+    instances = [model(**row) for row in values]
+    tuples = [tuple(row[name] for name in names) for row in values]
+    field = create_model_field(name=f"Response_{key}", type_=list_model, mode="serialization")
+
+    def default_path() -> bytes:
+        content = list_model(**{key: instances}, count=rows, count_exact=True, next_cursor=None)
+        serialised = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(serialised).body
+
+    def fast_path() -> bytes:
+        return encode_page(key, names, tuples, count=rows, count_exact=True, next_cursor=None)
+
+    default_ms, default_body = timed(default_path, repeat)
+    fast_ms, fast_body = timed(fast_path, repeat)
+    assert json.loads(default_body) == json.loads(fast_body), f"{key}: fast path output differs"
+    return default_ms, fast_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per path - the median is reported")
+    parser.add_argument("--entity", choices=list(ENTITIES), action="append", help="Limit to these entity types")
+    args = parser.parse_args()
+
+    print(f"{'entity':<24}{'default ms':>12}{'fast ms':>10}{'speedup':>10}")
+    for key in args.entity or ENTITIES:
+        default_ms, fast_ms = benchmark(key, args.rows, args.repeat)
+        print(f"{key:<24}{default_ms:>12.2f}{fast_ms:>10.2f}{default_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
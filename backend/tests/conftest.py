@@ -0,0 +1,72 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+""" TEST SETTINGS """
+# Database tests run against TEST_POSTGRES_DB - point it at a scratch database, they add rows and never clean up.
+# Without it they are skipped, and placeholder settings let the unit tests import the app with no configuration.
+
+TEST_DATABASE = os.environ.get("TEST_POSTGRES_DB")
+if TEST_DATABASE:
+    os.environ["POSTGRES_DB"] = TEST_DATABASE
+else:
+    for name, value in {
+        "FIRST_SUPERUSER": "admin@example.com",
+        "FIRST_SUPERUSER_PASSWORD": "changethis",
+        "PROJECT_NAME": "narvis",
+        "POSTGRES_SERVER": "localhost",
+        "POSTGRES_USER": "postgres",
+    }.items():
+        os.environ.setdefault(name, value)
+os.environ.setdefault("DB_ECHO", "false")
+# Graph routes load the graph on demand - a background load would share the pool with the test's own requests
+os.environ.setdefault("GRAPH_PRELOAD", "false")
+
+requires_database = pytest.mark.skipif(not TEST_DATABASE, reason="TEST_POSTGRES_DB is not set")
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """The app with its lifespan run, against a schema with the superuser and bench user 0 in it."""
+    if not TEST_DATABASE:
+        pytest.skip("TEST_POSTGRES_DB is not set")
+    from backend.app.main import app
+    from backend.benchmarks.seed import seed_users
+
+    asyncio.run(seed_users())
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def run_in_app(client: TestClient) -> Callable[[Callable[[Any], Awaitable[Any]]], Any]:
+    """Calls `function(session)` on the app's event loop - the engine's pool belongs to it, not to the test."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from backend.app.core.db import async_engine
+
+    async def call(function: Callable[[Any], Awaitable[Any]]) -> Any:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await function(session)
+
+    return lambda function: client.portal.call(call, function)
+
+
+@pytest.fixture
+def admin_headers(client: TestClient) -> dict[str, str]:
+    from backend.app.core.config import settings
+    from backend.benchmarks.query_plans import login
+
+    return login(client, settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD)
+
+
+@pytest.fixture
+def owner_headers(client: TestClient) -> dict[str, str]:
+    from backend.benchmarks.query_plans import login
+    from backend.benchmarks.seed import BENCH_PASSWORD, bench_email
+
+    return login(client, bench_email(0), BENCH_PASSWORD)
@@ -0,0 +1,32 @@
+from backend.app.core import cache
+from backend.app.core.cache import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert (entries.get("a"), entries.get("c")) == (1, 3)
+
+
+def test_entries_expire(monkeypatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    entries = TTLCache(maxsize=10, ttl=60)
+    entries.set("default", 1)
+    # A shorter ttl is kept, a longer one is capped at the cache's own
+    entries.set("short", 2, ttl=5)
+    entries.set("long", 3, ttl=600)
+    now += 30
+    assert (entries.get("default"), entries.get("short"), entries.get("long")) == (1, None, 3)
+    now += 31
+    assert (entries.get("default"), entries.get("long")) == (None, None)
+
+
+def test_expired_ttl_is_not_stored() -> None:
+    entries = TTLCache(maxsize=10, ttl=60)
+    entries.set("token", "user", ttl=-1)
+    assert entries.get("token") is None
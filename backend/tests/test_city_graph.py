@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+from typing import Any
+
+import networkx as nx
+
+from backend.app.services.city_graph import CityGraph
+
+
+def site() -> tuple[str, uuid.UUID]:
+    return "site", uuid.uuid4()
+
+
+def load_with_commits(graph: CityGraph, in_database: nx.Graph, during_load: list[list[tuple[str, Any, Any]]]) -> None:
+    """Loads `in_database` while each batch in `during_load` is committed - in between the load's round trips."""
+    async def build(session: Any) -> nx.Graph:
+        for changes in during_load:
+            graph.apply(changes)
+            await asyncio.sleep(0)
+        return in_database.copy()
+
+    graph._build = build
+    asyncio.run(graph.load(None))
+
+
+def test_changes_committed_before_the_first_load_finishes_are_kept() -> None:
+    graph = CityGraph()
+    first, second = site(), site()
+    # Dropped while nothing is loaded or loading - the load reads them from the database instead
+    graph.apply([("add_node", first, None)])
+    assert not graph.loaded
+
+    load_with_commits(graph, nx.Graph([(first, ("hub", uuid.uuid4()))]), [[("add_node", second, None)]])
+    assert graph.has_node(first)
+    assert graph.has_node(second)
+
+
+def test_changes_made_during_a_rebuild_reach_the_new_graph() -> None:
+    graph = CityGraph()
+    old, new, hub = site(), site(), ("hub", uuid.uuid4())
+    load_with_commits(graph, nx.Graph([(old, hub)]), [])
+
+    # The rebuild read the database before the edge was added and the old site removed
+    load_with_commits(graph, nx.Graph([(old, hub)]), [
+        [("add_edge", new, hub)],
+        [("remove_node", old, None)],
+    ])
+    assert graph.shortest_path(new, hub) == [new, hub]
+    assert not graph.has_node(old)
+    # Once loaded, changes go straight to the live graph
+    graph.apply([("remove_edge", new, hub)])
+    assert graph.shortest_path(new, hub) is None
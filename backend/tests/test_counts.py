@@ -0,0 +1,60 @@
+import uuid
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import func, select
+
+from backend.app.crud.counts import ALL_OWNERS
+from backend.app.models.models import Artefact, ArtefactMedia, EntityCount, Experience, User
+
+
+async def counts(session: Any, model: Any, owner_id: uuid.UUID = ALL_OWNERS) -> tuple[int, int]:
+    """(maintained counter, actual count) - compared by change, as the scratch database may hold older drift."""
+    row = await session.get(EntityCount, (model.__table__.name, owner_id), populate_existing=True)
+    actual = select(func.count()).select_from(model)
+    if owner_id != ALL_OWNERS:
+        actual = actual.where(model.owner_id == owner_id)
+    return (row.row_count if row is not None else 0), (await session.exec(actual)).one()
+
+
+def test_reassigning_an_owner_moves_the_row_between_counters(client: TestClient, run_in_app: Any) -> None:
+    async def reassign(session: Any) -> list[tuple[int, int]]:
+        old, new = (User(email=f"counts-{uuid.uuid4()}@example.com", hashed_password="-") for _ in range(2))
+        session.add_all([old, new])
+        await session.flush()
+        experiences = [Experience(experience_name=f"counted {n}", owner_id=old.id) for n in range(2)]
+        session.add_all(experiences)
+        await session.commit()
+        total = await counts(session, Experience)
+
+        experiences[0].owner_id = new.id
+        session.add(experiences[0])
+        await session.commit()
+        return [await counts(session, Experience, old.id), await counts(session, Experience, new.id), total,
+                await counts(session, Experience)]
+
+    old, new, total_before, total_after = run_in_app(reassign)
+    # Both owners are new, so their counters start from nothing
+    assert old == (1, 1)
+    assert new == (1, 1)
+    assert total_after == total_before
+
+
+def test_cascaded_deletes_are_counted(client: TestClient, run_in_app: Any, admin_headers: dict[str, str]) -> None:
+    async def add(session: Any) -> tuple[uuid.UUID, tuple[int, int]]:
+        artefact = Artefact(artefact_name="with media")
+        session.add(artefact)
+        await session.flush()
+        session.add_all([
+            ArtefactMedia(artefact_id=artefact.id, filename=f"{n}.txt", sha256=uuid.uuid4().hex * 2, size=1)
+            for n in range(3)
+        ])
+        await session.commit()
+        return artefact.id, await counts(session, ArtefactMedia)
+
+    artefact_id, (counter_before, actual_before) = run_in_app(add)
+    assert client.delete(f"/artefacts/{artefact_id}", headers=admin_headers).status_code == 200
+
+    counter_after, actual_after = run_in_app(lambda session: counts(session, ArtefactMedia))
+    assert actual_before - actual_after == 3
+    assert counter_before - counter_after == 3
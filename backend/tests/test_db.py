@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlmodel import SQLModel
+
+from backend.app.core import db
+from backend.app.core.db import schema_fingerprint
+
+
+def test_fingerprint_is_stable() -> None:
+    assert schema_fingerprint() == schema_fingerprint()
+
+
+def test_fingerprint_changes_with_the_models(monkeypatch) -> None:
+    before = schema_fingerprint()
+    metadata = MetaData()
+    for table in SQLModel.metadata.sorted_tables:
+        table.to_metadata(metadata)
+    Table("fingerprint_test", metadata, Column("id", Integer, primary_key=True))
+    monkeypatch.setattr(SQLModel, "metadata", metadata)
+    assert schema_fingerprint() != before
+
+
+def test_fingerprint_changes_with_the_migrations(monkeypatch) -> None:
+    before = schema_fingerprint()
+    monkeypatch.setattr(db, "MIGRATIONS", [*db.MIGRATIONS, ("999_test", "", "")])
+    assert schema_fingerprint() != before
@@ -0,0 +1,63 @@
+import uuid
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from backend.app.models.models import Experience, Hub, Site, User
+from backend.benchmarks.seed import bench_email
+
+
+def add_rows(run_in_app: Any) -> dict[str, uuid.UUID]:
+    """An experience owned by bench user 0, one owned by someone else, a site and a hub."""
+    async def add(session: Any) -> dict[str, uuid.UUID]:
+        owner = (await session.exec(select(User).where(User.email == bench_email(0)))).one()
+        other = User(email=f"links-{uuid.uuid4()}@example.com", hashed_password="-")
+        session.add(other)
+        await session.flush()
+        rows = {
+            "mine": Experience(experience_name="mine", owner_id=owner.id),
+            "theirs": Experience(experience_name="theirs", owner_id=other.id),
+            "site": Site(site_name="linked site"),
+            "hub": Hub(hub_name="linked hub"),
+        }
+        session.add_all(rows.values())
+        await session.commit()
+        return {name: row.id for name, row in rows.items()}
+
+    return run_in_app(add)
+
+
+def test_owner_links_own_rows(client: TestClient, run_in_app: Any, owner_headers: dict[str, str]) -> None:
+    ids = add_rows(run_in_app)
+    pairs = {"pairs": [[str(ids["mine"]), str(ids["site"])]]}
+    response = client.post("/links/experience-site/attach", json=pairs, headers=owner_headers)
+    assert response.status_code == 200
+    assert response.json()["affected"] == 1
+    response = client.put(f"/links/experience-site/{ids['mine']}", json={"ids": []}, headers=owner_headers)
+    assert response.json()["affected"] == 1
+
+
+def test_owner_cannot_link_others_rows(client: TestClient, run_in_app: Any, owner_headers: dict[str, str],
+                                       admin_headers: dict[str, str]) -> None:
+    ids = add_rows(run_in_app)
+    pairs = {"pairs": [[str(ids["mine"]), str(ids["site"])], [str(ids["theirs"]), str(ids["site"])]]}
+    for action in ("attach", "detach"):
+        response = client.post(f"/links/experience-site/{action}", json=pairs, headers=owner_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "No permission to access this experience"
+
+    response = client.put(f"/links/experience-site/{ids['theirs']}", json={"ids": []}, headers=owner_headers)
+    assert response.status_code == 400
+    response = client.post("/links/experience-site/attach", json=pairs, headers=admin_headers)
+    assert response.json()["affected"] == 2
+
+
+def test_unowned_links_are_superuser_only(client: TestClient, run_in_app: Any, owner_headers: dict[str, str],
+                                          admin_headers: dict[str, str]) -> None:
+    ids = add_rows(run_in_app)
+    pairs = {"pairs": [[str(ids["site"]), str(ids["hub"])]]}
+    response = client.post("/links/site-hub/attach", json=pairs, headers=owner_headers)
+    assert response.status_code == 400
+    response = client.post("/links/site-hub/attach", json=pairs, headers=admin_headers)
+    assert response.json()["affected"] == 1
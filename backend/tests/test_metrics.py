@@ -0,0 +1,34 @@
+from backend.app.core.metrics import Histogram, render_metric
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = Histogram("request_seconds", "Request time.", ("route",), [0.1, 0.5])
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(("/sites/",), value)
+    assert list(histogram.render()) == [
+        "# HELP request_seconds Request time.",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{route="/sites/",le="0.1"} 2',
+        'request_seconds_bucket{route="/sites/",le="0.5"} 3',
+        'request_seconds_bucket{route="/sites/",le="+Inf"} 4',
+        'request_seconds_sum{route="/sites/"} 2.45',
+        'request_seconds_count{route="/sites/"} 4',
+    ]
+
+
+def test_histogram_series_are_sorted_and_escaped() -> None:
+    histogram = Histogram("request_seconds", "Request time.", ("route",), [1])
+    histogram.observe(('/b"\n',), 0.5)
+    histogram.observe(("/a",), 0.5)
+    lines = [line for line in histogram.render() if "_count" in line]
+    assert lines == ['request_seconds_count{route="/a"} 1', 'request_seconds_count{route="/b\\"\\n"} 1']
+
+
+def test_empty_histogram_renders_only_its_header() -> None:
+    assert len(list(Histogram("empty", "Nothing yet.", (), [1]).render())) == 2
+
+
+def test_metric_without_labels() -> None:
+    assert list(render_metric("in_flight", "gauge", "Requests.", [({}, 3)])) == [
+        "# HELP in_flight Requests.", "# TYPE in_flight gauge", "in_flight 3",
+    ]
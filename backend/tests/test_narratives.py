@@ -0,0 +1,39 @@
+import re
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+from backend.app.models.models import Artefact, Experience, Narrative, Site, Substory, Tour
+
+
+def add_narrative(run_in_app: Any, size: int) -> Any:
+    """A narrative with `size` of everything the graph route loads."""
+    async def add(session: Any) -> Any:
+        narrative = Narrative(narrative_name=f"graph of {size}", narrative_description="query count")
+        narrative.substories = [Substory(substory_name=f"substory {n}") for n in range(size)]
+        narrative.artefacts = [Artefact(artefact_name=f"artefact {n}") for n in range(size)]
+        narrative.sites = [Site(site_name=f"site {n}") for n in range(size)]
+        narrative.tours = [Tour(tour_name=f"tour {n}") for n in range(size)]
+        narrative.experiences = [Experience(experience_name=f"experience {n}") for n in range(size)]
+        session.add(narrative)
+        await session.commit()
+        return narrative.id
+
+    return run_in_app(add)
+
+
+def graph_queries(client: TestClient, narrative_id: Any, headers: dict[str, str]) -> int:
+    response = client.get(f"/narratives/{narrative_id}/graph", headers=headers)
+    assert response.status_code == 200
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+
+def test_graph_query_count_does_not_grow(client: TestClient, run_in_app: Any, admin_headers: dict[str, str]) -> None:
+    small, large = add_narrative(run_in_app, 1), add_narrative(run_in_app, 25)
+    # The first request also loads the current user into its cache
+    graph_queries(client, small, admin_headers)
+    queries = graph_queries(client, small, admin_headers)
+    assert queries > 0
+    assert graph_queries(client, large, admin_headers) == queries
+    response = client.get(f"/narratives/{large}/graph", headers=admin_headers)
+    assert len(response.json()["sites"]) == 25
@@ -0,0 +1,24 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend.app.core.db import pool_stats
+
+
+def test_session_waits_are_measured(client: TestClient, run_in_app: Any) -> None:
+    async def query(session: Any) -> None:
+        await session.execute(text("SELECT 1"))
+
+    checkouts, waits = pool_stats.checkouts, pool_stats.wait_count
+    run_in_app(query)
+    assert pool_stats.checkouts == checkouts + 1
+    assert pool_stats.wait_count == waits + 1
+
+
+def test_cached_requests_never_connect(client: TestClient, owner_headers: dict[str, str]) -> None:
+    # The first call caches the token and user - the second is answered without a session ever connecting
+    assert client.post("/login/test-token", headers=owner_headers).status_code == 200
+    checkouts = pool_stats.checkouts
+    assert client.post("/login/test-token", headers=owner_headers).status_code == 200
+    assert pool_stats.checkouts == checkouts
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+from backend.benchmarks.query_plans import check_plan, run_checks
+from backend.tests.conftest import requires_database
+
+# Rows per entity table the database is topped up to - below the planner's sequential scan range nothing is checked
+ROWS = int(os.environ.get("QUERY_PLAN_ROWS", 50000))
+
+
+def test_filtered_sequential_scan_of_a_large_table() -> None:
+    plan = {"Node Type": "Seq Scan", "Relation Name": "site", "Filter": "(hub_id = $1)", "Plan Rows": 5}
+    assert check_plan(plan, {"site": 50000}, 10000) == ["filtered sequential scan of site (50000 rows): (hub_id = $1)"]
+    assert check_plan(plan, {"site": 500}, 10000) == []
+
+
+def test_filter_keeping_most_rows_is_allowed() -> None:
+    plan = {"Node Type": "Seq Scan", "Relation Name": "site", "Filter": "(hub_id IS NOT NULL)", "Plan Rows": 49000}
+    assert check_plan(plan, {"site": 50000}, 10000) == []
+
+
+def test_unfiltered_sequential_scan_is_allowed() -> None:
+    assert check_plan({"Node Type": "Seq Scan", "Relation Name": "site"}, {"site": 50000}, 10000) == []
+
+
+def test_nested_loop_over_a_sequential_scan() -> None:
+    plan = {"Node Type": "Nested Loop", "Plans": [
+        {"Node Type": "Index Scan", "Relation Name": "hub", "Index Name": "hub_pkey", "Index Cond": "(id = $1)"},
+        {"Node Type": "Seq Scan", "Relation Name": "site"},
+    ]}
+    assert check_plan(plan, {"site": 2000, "hub": 2000}, 10000) == [
+        "nested loop over a sequential scan of site (2000 rows)"
+    ]
+
+
+def test_index_walked_only_for_its_order() -> None:
+    plan = {"Node Type": "Index Scan", "Relation Name": "site", "Index Name": "site_pkey", "Filter": "(hub_id = $1)"}
+    assert check_plan(plan, {"site": 50000}, 10000) == [
+        "filtered full scan of site_pkey (50000 rows): (hub_id = $1)"
+    ]
+
+
+@requires_database
+def test_query_plans() -> None:
+    from backend.benchmarks.seed import seed_to
+
+    asyncio.run(seed_to(ROWS))
+    checked, problems = run_checks(ROWS)
+    assert checked
+    assert not problems, "\n".join(problems)
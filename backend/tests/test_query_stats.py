@@ -0,0 +1,41 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from backend.app.core.query_stats import QueryStats, current_query_stats, normalise_sql
+
+
+def test_parameters_and_literals_are_replaced() -> None:
+    assert normalise_sql("SELECT a FROM t WHERE name = 'o''brien' AND size > 10.5 LIMIT $1") == \
+        "SELECT a FROM t WHERE name = ? AND size > ? LIMIT ?"
+
+
+def test_expanded_in_lists_collapse_to_one_placeholder() -> None:
+    # However many ids are sent, the statement groups as one for N+1 detection
+    assert normalise_sql("SELECT a FROM t WHERE id IN ($1::UUID, $2::UUID, $3::UUID)") == \
+        normalise_sql("SELECT a FROM t WHERE id IN ($1::UUID)") == "SELECT a FROM t WHERE id IN (?)"
+    assert normalise_sql("SELECT a FROM t WHERE id = ANY ($1::UUID[])") == "SELECT a FROM t WHERE id = ANY (?)"
+
+
+def test_whitespace_and_identifiers() -> None:
+    assert normalise_sql("SELECT t1.a\n  FROM t1\n WHERE t1.b = $1") == "SELECT t1.a FROM t1 WHERE t1.b = ?"
+
+
+def test_failed_statements_are_not_counted(client: Any, run_in_app: Any) -> None:
+    stats = QueryStats({"type": "http", "path": "/test"})
+
+    async def queries(session: Any) -> None:
+        token = current_query_stats.set(stats)
+        try:
+            with pytest.raises(DBAPIError):
+                await session.execute(text("SELECT 1 / 0"))
+            await session.rollback()
+            await session.execute(text("SELECT 1"))
+        finally:
+            current_query_stats.reset(token)
+
+    run_in_app(queries)
+    assert stats.count == 1
+    assert list(stats.statements) == ["SELECT ?"]
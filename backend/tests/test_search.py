@@ -0,0 +1,29 @@
+import uuid
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+from backend.app.models.models import Narrative
+
+
+def test_highlights_escape_stored_markup(client: TestClient, run_in_app: Any, admin_headers: dict[str, str]) -> None:
+    word = f"zephyr{uuid.uuid4().hex[:8]}"
+
+    async def add(session: Any) -> None:
+        session.add(Narrative(
+            narrative_name="markup",
+            narrative_description=f'<script>alert(1)</script> A {word} & an <img src=x onerror="alert(2)"> tag',
+        ))
+        await session.commit()
+
+    run_in_app(add)
+    response = client.get(f"/search/?q={word}", headers=admin_headers)
+    assert response.status_code == 200
+    [hit] = response.json()["hits"]
+    highlight = hit["highlight"]
+    assert f"<mark>{word}</mark>" in highlight
+    assert "<script>" not in highlight and "<img" not in highlight
+    assert "&lt;/script&gt;" in highlight
+    assert "&amp;" in highlight
+    # The marks are the only tags left
+    assert highlight.count("<") == highlight.count("<mark>") + highlight.count("</mark>")
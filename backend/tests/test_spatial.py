@@ -0,0 +1,29 @@
+import pytest
+from fastapi import HTTPException
+
+from backend.app.crud.spatial import parse_bbox
+
+
+def test_viewport_order() -> None:
+    assert parse_bbox("-0.2,51.45,-0.1,51.55") == (-0.2, 51.45, -0.1, 51.55)
+    assert parse_bbox("-180,-90,180,90") == (-180, -90, 180, 90)
+
+
+@pytest.mark.parametrize("bbox", [
+    "nan,nan,nan,nan",
+    "-0.2,51.45,nan,51.55",
+    "-inf,51.45,-0.1,51.55",
+    "-0.2,51.45,-0.1,inf",
+    "-181,51.45,-0.1,51.55",
+    "-0.2,51.45,180.5,51.55",
+    "-0.2,-91,-0.1,51.55",
+    "-0.2,51.45,-0.1,90.01",
+    "-0.1,51.45,-0.2,51.55",
+    "-0.2,51.55,-0.1,51.45",
+    "-0.2,51.45,-0.1",
+    "west,south,east,north",
+])
+def test_invalid_boxes_are_rejected(bbox: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        parse_bbox(bbox)
+    assert error.value.status_code == 400
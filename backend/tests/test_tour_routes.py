@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from backend.app.services.tour_routes import haversine_matrix, optimise, two_opt
+
+
+def path_length(order: list[int], lat: np.ndarray, lon: np.ndarray) -> float:
+    distances = haversine_matrix(lat, lon)
+    return float(sum(distances[a, b] for a, b in zip(order, order[1:])))
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3])
+def test_short_routes(count: int) -> None:
+    lat, lon = np.linspace(51.50, 51.52, count), np.linspace(-0.12, -0.10, count)
+    order, legs = optimise(lat, lon)
+    assert sorted(order) == list(range(count))
+    assert len(legs) == count
+    if count:
+        assert legs[0] == 0.0
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3])
+def test_two_opt_leaves_short_tours_alone(count: int) -> None:
+    route = np.arange(count)
+    assert list(two_opt(route.copy(), np.ones((count, count)))) == list(range(count))
+
+
+def test_sites_on_a_line_are_visited_in_order() -> None:
+    lat = np.array([51.50, 51.54, 51.51, 51.53, 51.52])
+    lon = np.full(5, -0.1)
+    order, _ = optimise(lat, lon)
+    assert [lat[index] for index in order] in (sorted(lat), sorted(lat, reverse=True))
+    assert path_length(order, lat, lon) == pytest.approx(path_length([0, 2, 4, 3, 1], lat, lon))
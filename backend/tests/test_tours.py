@@ -0,0 +1,59 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.models.models import Site, Tour
+
+
+def test_tour_routes_are_superuser_only(client: TestClient, run_in_app: Any, owner_headers: dict[str, str],
+                                        admin_headers: dict[str, str]) -> None:
+    # Tours have no owner column, so only superusers may read or optimise their routes
+    async def add(session: Any) -> Any:
+        tour = Tour(tour_name="route permissions")
+        session.add(tour)
+        await session.commit()
+        return tour.id
+
+    tour_id = run_in_app(add)
+    for method in ("GET", "POST"):
+        response = client.request(method, f"/tours/{tour_id}/route", headers=owner_headers)
+        assert response.status_code == 400
+        response = client.request(method, f"/tours/{tour_id}/route", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_linking_sites_updates_the_route(client: TestClient, run_in_app: Any, admin_headers: dict[str, str]) -> None:
+    async def add(session: Any) -> Any:
+        # About 1.1 km apart, north to south
+        rows = [Tour(tour_name="linked sites")] + [
+            Site(site_name=f"site {n}", site_boundary_north=51.50 + n / 100 + 0.001,
+                 site_boundary_south=51.50 + n / 100 - 0.001, site_boundary_east=-0.099, site_boundary_west=-0.101)
+            for n in range(2)
+        ]
+        session.add_all(rows)
+        await session.commit()
+        return [row.id for row in rows]
+
+    tour_id, first, second = run_in_app(add)
+
+    def link(action: str, site_id: Any) -> None:
+        pairs = {"pairs": [[str(site_id), str(tour_id)]]}
+        assert client.post(f"/links/site-tour/{action}", json=pairs, headers=admin_headers).status_code == 200
+
+    def route() -> dict[str, Any]:
+        return client.get(f"/tours/{tour_id}/route", headers=admin_headers).json()
+
+    link("attach", first)
+    assert (route()["tour_length"], route()["optimised"]) == (0.0, True)
+
+    link("attach", second)
+    linked = route()
+    assert linked["optimised"]
+    assert linked["tour_length"] == pytest.approx(1.112, abs=0.01)
+    assert linked["tour_time"] > 0
+    assert [stop["visit_order"] for stop in linked["stops"]] == [0, 1]
+
+    link("detach", first)
+    assert route()["tour_length"] == 0.0
+    assert [stop["site_id"] for stop in route()["stops"]] == [str(second)]
@@ -3,7 +3,15 @@
 set -e
 set -x
 
-python backend/app/db_connection_check.py
-python backend/app/initial_data.py
+# Waits for Postgres with exponential backoff, then syncs the schema - a no-op when the models haven't changed
+python -m backend.app.db_connection_check
+python -m backend.app.initial_data
 
-uvicorn backend.app.main:app --host 127.0.0.1 --port 8000 --reload
+if [ "${ENVIRONMENT:-local}" = "local" ]; then
+    exec uvicorn backend.app.main:app --host 127.0.0.1 --port 8000 --reload
+fi
+
+# No reloader in production. Each worker warms its own pool before serving, and with more than one worker
+# SECRET_KEY must be set - otherwise every worker signs tokens with a different random key
+exec uvicorn backend.app.main:app --host "${HOST:-127.0.0.1}" --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-1}"